@@ -1,10 +1,12 @@
-
+import sys
 
 from lib.models.author import Author
 from lib.models.magazine import Magazine
-from lib.models.article import Article
+from lib.db.connection import transaction
+from lib.models.identity_map import identity_map
 
 def main():
+    identity_map.enable()
     print("\n=== Welcome to the Articles CLI ===\n")
     while True:
         print("Options:")
@@ -32,9 +34,10 @@ def main():
             author_id = int(input("Enter author ID: "))
             magazine_id = int(input("Enter magazine ID: "))
             title = input("Enter article title: ")
-            author = Author.find_by_id(author_id)
-            magazine = Magazine(magazine_id, "", "") 
-            article = author.add_article(magazine, title)
+            with transaction():
+                author = Author.find_by_id(author_id)
+                magazine = Magazine(magazine_id, "", "")
+                article = author.add_article(magazine, title)
             print(f"Article '{title}' added for author ID {author_id} and magazine ID {magazine_id}.")
 
         elif choice == "4":
@@ -63,4 +66,8 @@ def main():
             print("Invalid choice. Please try again.")
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Arguments select the non-interactive batch commands.
+        from lib.scripts.batch import main as batch_main
+        sys.exit(batch_main())
     main()
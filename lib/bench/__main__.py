@@ -0,0 +1,67 @@
+# Usage:
+#   python -m lib.bench --articles 100000 --output bench.json
+#   python -m lib.bench --articles 100000 --compare baseline.json
+#
+# Exits 1 when --compare finds a regression.
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import sys
+
+from lib.bench import datagen, runner
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+
+def count(value):
+    # Accept 1e5 as well as 100000.
+    return int(float(value))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the model layer on synthetic data.")
+    parser.add_argument("--articles", type=count, default=10_000, help="dataset size, 1e3 to 1e7")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--scan-iterations", type=int, default=3,
+                        help="iterations for whole-table benchmarks such as Article.all")
+    parser.add_argument("--only", help="run benchmarks whose name contains this text")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="where generated datasets are kept")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown before a benchmark counts as regressed")
+    args = parser.parse_args(argv)
+
+    dataset = datagen.ensure_dataset(args.cache_dir, args.articles, args.seed)
+    results = runner.run(dataset, args.iterations, args.scan_iterations, args.seed, args.only)
+    report = {
+        "meta": {
+            "articles": args.articles,
+            "seed": args.seed,
+            "iterations": args.iterations,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        report["regressions"] = runner.compare(results, baseline["results"], args.threshold)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 1 if report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+# lib/bench/datagen.py
+#
+# Deterministic synthetic datasets for the benchmark suite. The same
+# (articles, seed) pair always produces the same database, so timings from
+# different commits are comparable. Rows come from the bulk seeder in
+# lib/db/seed.py with uniform author/magazine picks, so per-author and
+# per-magazine timings do not depend on which ids a benchmark samples.
+
+import os
+
+from lib.db import connection
+from lib.db.seed import seed_db
+
+# Bumped whenever the generator changes, so cached datasets are rebuilt.
+DATASET_VERSION = 2
+
+
+def default_counts(articles):
+    return max(10, articles // 100), max(5, articles // 1000)
+
+
+def dataset_path(cache_dir, articles, seed):
+    return os.path.join(cache_dir, f"articles-v{DATASET_VERSION}-{articles}-seed{seed}.db")
+
+
+def generate(db_path, articles, authors=None, magazines=None, seed=0):
+    default_authors, default_magazines = default_counts(articles)
+    seed_db(db_path, authors or default_authors, magazines or default_magazines, articles,
+            seed=seed, skew=0)
+    connection.close_pools()
+    return db_path
+
+
+def ensure_dataset(cache_dir, articles, seed=0):
+    """Return the cached dataset for (articles, seed), generating it once."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = dataset_path(cache_dir, articles, seed)
+    if not os.path.exists(path):
+        partial = path + ".partial"
+        for leftover in (partial, partial + "-wal", partial + "-shm"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        generate(partial, articles, seed=seed)
+        os.replace(partial, path)
+    return path
@@ -0,0 +1,97 @@
+# Usage: python -m lib.bench.model_memory [--count N]
+#
+# Loads N articles from an in-memory database the old way (sqlite3.Row
+# rows unpacked into a dict-backed class) and the new way (Article.from_row
+# building __slots__ instances), and reports bytes per article for each.
+
+import argparse
+import gc
+import json
+import sqlite3
+import time
+import tracemalloc
+
+from lib.models.article import Article
+
+
+class DictArticle:
+    """The pre-__slots__ shape of Article, kept for comparison."""
+
+    def __init__(self, id=None, title=None, author_id=None, magazine_id=None):
+        self.id = id
+        self.title = title
+        self.author_id = author_id
+        self.magazine_id = magazine_id
+
+
+def build_database(count):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""
+        CREATE TABLE articles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            author_id INTEGER,
+            magazine_id INTEGER
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO articles (title, author_id, magazine_id) VALUES (?, ?, ?)",
+        ((f"Article title {i}", i % 1000, i % 100) for i in range(count)),
+    )
+    conn.commit()
+    return conn
+
+
+def load_dict_articles(conn):
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    cursor.execute("SELECT id, title, author_id, magazine_id FROM articles")
+    return [DictArticle(*row) for row in cursor.fetchall()]
+
+
+def load_slotted_articles(conn):
+    cursor = conn.cursor()
+    cursor.row_factory = Article.from_row
+    cursor.execute("SELECT id, title, author_id, magazine_id FROM articles")
+    return cursor.fetchall()
+
+
+def measure(conn, loader, count):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    articles = loader(conn)
+    elapsed = time.perf_counter() - started
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(articles) == count
+    del articles
+    return {
+        "seconds": round(elapsed, 3),
+        "retained_bytes_per_article": round(retained / count, 1),
+        "peak_bytes_per_article": round(peak / count, 1),
+        "retained_mib": round(retained / 2**20, 1),
+    }
+
+
+def run(count):
+    conn = build_database(count)
+    try:
+        return {
+            "articles": count,
+            "before": measure(conn, load_dict_articles, count),
+            "after": measure(conn, load_slotted_articles, count),
+        }
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memory per Article instance, before and after __slots__.")
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.count), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+# lib/bench/runner.py
+
+import contextlib
+import io
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from unittest import mock
+
+from lib.db.connection import get_connection_cm, using_database
+from lib.models.article import Article
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+BENCHMARKS = []
+
+
+def benchmark(name, scan=False):
+    """Register ``factory(ctx) -> op``; ``op()`` is timed once per iteration.
+
+    Scan benchmarks touch whole tables and run ``scan_iterations`` times.
+    """
+    def register(factory):
+        BENCHMARKS.append((name, scan, factory))
+        return factory
+    return register
+
+
+class Context:
+    """Deterministic sample of ids and values to feed the benchmarks."""
+
+    SAMPLE_SIZE = 200
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        with get_connection_cm() as conn:
+            self.author_ids = [row[0] for row in conn.execute("SELECT id FROM authors")]
+            self.magazine_ids = [row[0] for row in conn.execute("SELECT id FROM magazines")]
+            self.max_article = conn.execute("SELECT MAX(id) FROM articles").fetchone()[0] or 0
+            article_ids = ([self.rng.randint(1, self.max_article) for _ in range(self.SAMPLE_SIZE)]
+                           if self.max_article else [])
+            self.titles = [
+                conn.execute("SELECT title FROM articles WHERE id = ?", (i,)).fetchone()[0]
+                for i in article_ids
+            ]
+            self.author_names = [
+                conn.execute("SELECT name FROM authors WHERE id = ?", (i,)).fetchone()[0]
+                for i in self.rng.sample(self.author_ids, min(self.SAMPLE_SIZE, len(self.author_ids)))
+            ]
+            self.categories = [row[0] for row in conn.execute("SELECT DISTINCT category FROM magazines")]
+        self.counter = 0
+
+    def pick(self, values):
+        return self.rng.choice(values)
+
+    def author(self):
+        return Author(self.pick(self.author_ids), None)
+
+    def magazine(self):
+        return Magazine(self.pick(self.magazine_ids), None, None)
+
+    def unique(self, prefix):
+        self.counter += 1
+        return f"{prefix} {self.counter}"
+
+
+def _drain(iterable):
+    for _ in iterable:
+        pass
+
+
+# --- Article ---
+
+@benchmark("Article.create")
+def _(ctx):
+    return lambda: Article.create(ctx.unique("Bench article"), ctx.pick(ctx.author_ids), ctx.pick(ctx.magazine_ids))
+
+@benchmark("Article.create_many[100]")
+def _(ctx):
+    return lambda: Article.create_many(
+        (ctx.unique("Bench article"), ctx.pick(ctx.author_ids), ctx.pick(ctx.magazine_ids)) for _ in range(100))
+
+@benchmark("Article.all", scan=True)
+def _(ctx):
+    return Article.all
+
+@benchmark("Article.iter_all", scan=True)
+def _(ctx):
+    return lambda: _drain(Article.iter_all())
+
+@benchmark("Article.find_by_author")
+def _(ctx):
+    return lambda: Article.find_by_author(ctx.pick(ctx.author_ids))
+
+@benchmark("Article.iter_by_author")
+def _(ctx):
+    return lambda: _drain(Article.iter_by_author(ctx.pick(ctx.author_ids)))
+
+@benchmark("Article.find_by_magazine")
+def _(ctx):
+    return lambda: Article.find_by_magazine(ctx.pick(ctx.magazine_ids))
+
+@benchmark("Article.iter_by_magazine")
+def _(ctx):
+    return lambda: _drain(Article.iter_by_magazine(ctx.pick(ctx.magazine_ids)))
+
+@benchmark("Article.find_by_title")
+def _(ctx):
+    return lambda: Article.find_by_title(ctx.pick(ctx.titles))
+
+@benchmark("Article.page")
+def _(ctx):
+    return lambda: Article.page(after_id=ctx.rng.randint(0, ctx.max_article), limit=50)
+
+@benchmark("Article.page[author]")
+def _(ctx):
+    return lambda: Article.page(limit=50, author_id=ctx.pick(ctx.author_ids))
+
+@benchmark("Article.search")
+def _(ctx):
+    return lambda: Article.search(ctx.pick(ctx.titles).split()[0])
+
+# --- Author ---
+
+@benchmark("Author.create")
+def _(ctx):
+    return lambda: Author.create(ctx.unique("Bench author"))
+
+@benchmark("Author.create_many[100]")
+def _(ctx):
+    return lambda: Author.create_many((ctx.unique("Bench author"),) for _ in range(100))
+
+@benchmark("Author.find_by_id")
+def _(ctx):
+    return lambda: Author.find_by_id(ctx.pick(ctx.author_ids))
+
+@benchmark("Author.find_by_name")
+def _(ctx):
+    return lambda: Author.find_by_name(ctx.pick(ctx.author_names))
+
+@benchmark("Author.page")
+def _(ctx):
+    return lambda: Author.page(after_id=ctx.pick(ctx.author_ids), limit=50)
+
+@benchmark("Author.prefetch[50]")
+def _(ctx):
+    return lambda: Author.prefetch(
+        [ctx.author() for _ in range(50)], "articles", "magazines", "topic_areas")
+
+@benchmark("Author.top_author")
+def _(ctx):
+    return Author.top_author
+
+@benchmark("Author.add_article")
+def _(ctx):
+    return lambda: ctx.author().add_article(ctx.magazine(), ctx.unique("Bench article"))
+
+@benchmark("Author.articles")
+def _(ctx):
+    return lambda: ctx.author().articles()
+
+@benchmark("Author.magazines")
+def _(ctx):
+    return lambda: ctx.author().magazines()
+
+@benchmark("Author.topic_areas")
+def _(ctx):
+    return lambda: ctx.author().topic_areas()
+
+@benchmark("Author.save")
+def _(ctx):
+    def op():
+        author = ctx.author()
+        author.name = ctx.unique("Renamed author")
+        author.save()
+    return op
+
+# --- Magazine ---
+
+@benchmark("Magazine.create")
+def _(ctx):
+    return lambda: Magazine.create(ctx.unique("Bench magazine"), ctx.pick(ctx.categories))
+
+@benchmark("Magazine.create_many[100]")
+def _(ctx):
+    return lambda: Magazine.create_many(
+        (ctx.unique("Bench magazine"), ctx.pick(ctx.categories)) for _ in range(100))
+
+@benchmark("Magazine.find_by_id")
+def _(ctx):
+    return lambda: Magazine.find_by_id(ctx.pick(ctx.magazine_ids))
+
+@benchmark("Magazine.find_by_name")
+def _(ctx):
+    return lambda: Magazine.find_by_name(f"missing {ctx.rng.random()}")
+
+@benchmark("Magazine.find_by_category")
+def _(ctx):
+    return lambda: Magazine.find_by_category(ctx.pick(ctx.categories))
+
+@benchmark("Magazine.page")
+def _(ctx):
+    return lambda: Magazine.page(after_id=ctx.pick(ctx.magazine_ids), limit=50)
+
+@benchmark("Magazine.prefetch[20]")
+def _(ctx):
+    return lambda: Magazine.prefetch(
+        [ctx.magazine() for _ in range(20)], "contributors", "contributing_authors")
+
+@benchmark("Magazine.articles")
+def _(ctx):
+    return lambda: ctx.magazine().articles()
+
+@benchmark("Magazine.contributors")
+def _(ctx):
+    return lambda: ctx.magazine().contributors()
+
+@benchmark("Magazine.article_titles")
+def _(ctx):
+    return lambda: ctx.magazine().article_titles()
+
+@benchmark("Magazine.contributing_authors")
+def _(ctx):
+    return lambda: ctx.magazine().contributing_authors()
+
+@benchmark("Magazine.with_multiple_authors", scan=True)
+def _(ctx):
+    return Magazine.with_multiple_authors
+
+@benchmark("Magazine.article_counts", scan=True)
+def _(ctx):
+    return Magazine.article_counts
+
+@benchmark("Magazine.save")
+def _(ctx):
+    def op():
+        magazine = ctx.magazine()
+        magazine.name = ctx.unique("Renamed magazine")
+        magazine.category = ctx.pick(ctx.categories)
+        magazine.save()
+    return op
+
+# --- CLI flows (lib/models/cli.py), with input() scripted and output discarded ---
+
+def _cli_flow(fn, *answers):
+    def op():
+        with mock.patch("builtins.input", side_effect=list(answers) + ["q"] * 10), \
+                contextlib.redirect_stdout(io.StringIO()):
+            fn()
+    return op
+
+def _stop_paging(ids):
+    """Answer to the "Enter for more" prompt, shown when a listing has more than one page."""
+    from lib.models import cli
+    return ["q"] if len(ids) > cli.PAGE_SIZE else []
+
+@benchmark("cli.list_authors")
+def _(ctx):
+    from lib.models import cli
+    return _cli_flow(cli.list_authors, *_stop_paging(ctx.author_ids))
+
+@benchmark("cli.list_magazines")
+def _(ctx):
+    from lib.models import cli
+    return _cli_flow(cli.list_magazines, *_stop_paging(ctx.magazine_ids))
+
+@benchmark("cli.add_article")
+def _(ctx):
+    from lib.models import cli
+    return lambda: _cli_flow(
+        cli.add_article,
+        *_stop_paging(ctx.author_ids), str(ctx.pick(ctx.author_ids)),
+        *_stop_paging(ctx.magazine_ids), str(ctx.pick(ctx.magazine_ids)),
+        ctx.unique("Bench article"))()
+
+@benchmark("cli.view_author_articles")
+def _(ctx):
+    from lib.models import cli
+    return lambda: _cli_flow(cli.view_author_articles, *_stop_paging(ctx.author_ids), str(ctx.pick(ctx.author_ids)))()
+
+@benchmark("cli.view_magazine_contributors")
+def _(ctx):
+    from lib.models import cli
+    return lambda: _cli_flow(
+        cli.view_magazine_contributors, *_stop_paging(ctx.magazine_ids), str(ctx.pick(ctx.magazine_ids)))()
+
+@benchmark("cli.view_topic_areas")
+def _(ctx):
+    from lib.models import cli
+    return lambda: _cli_flow(cli.view_topic_areas, *_stop_paging(ctx.author_ids), str(ctx.pick(ctx.author_ids)))()
+
+@benchmark("cli.list_magazines_by_author")
+def _(ctx):
+    from lib.models import cli
+    return lambda: _cli_flow(cli.list_magazines_by_author, *_stop_paging(ctx.author_ids), str(ctx.pick(ctx.author_ids)))()
+
+@benchmark("cli.list_articles_by_author_name")
+def _(ctx):
+    from lib.models import cli
+    return lambda: _cli_flow(cli.list_articles_by_author_name, ctx.pick(ctx.author_names))()
+
+@benchmark("cli.most_prolific_author")
+def _(ctx):
+    from lib.models import cli
+    return _cli_flow(cli.most_prolific_author)
+
+@benchmark("cli.search_articles")
+def _(ctx):
+    from lib.models import cli
+    return lambda: _cli_flow(cli.search_articles, ctx.pick(ctx.titles).split()[0])()
+
+
+def percentile(sorted_values, q):
+    index = max(0, math.ceil(q * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def peak_rss_mib():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+def time_op(op, iterations):
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter_ns()
+        op()
+        latencies.append((time.perf_counter_ns() - t0) / 1e6)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(latencies, 0.50), 4),
+        "p95_ms": round(percentile(latencies, 0.95), 4),
+        "p99_ms": round(percentile(latencies, 0.99), 4),
+        "max_ms": round(latencies[-1], 4),
+        "throughput_ops": round(iterations / elapsed, 1) if elapsed else None,
+        "peak_rss_mib": peak_rss_mib(),
+    }
+
+
+def run(dataset, iterations=100, scan_iterations=3, seed=0, only=None):
+    """Time every registered benchmark against a scratch copy of ``dataset``."""
+    workdir = tempfile.mkdtemp(prefix="articles-bench-")
+    try:
+        work_db = os.path.join(workdir, "bench.db")
+        shutil.copyfile(dataset, work_db)
+        with using_database(work_db):
+            ctx = Context(seed)
+            results = {}
+            for name, scan, factory in BENCHMARKS:
+                if only and only not in name:
+                    continue
+                op = factory(ctx)
+                op()  # warm-up: page cache, statement cache, imports
+                results[name] = time_op(op, scan_iterations if scan else iterations)
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(current, baseline, threshold=0.25, min_delta_ms=0.05):
+    """Return benchmarks whose p50 or p95 got more than ``threshold`` slower."""
+    regressions = []
+    for name, result in current.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            before, after = base[metric], result[metric]
+            if after - before > min_delta_ms and after > before * (1 + threshold):
+                regressions.append({
+                    "benchmark": name,
+                    "metric": metric,
+                    "baseline": before,
+                    "current": after,
+                    "ratio": round(after / before, 2) if before else None,
+                })
+    return regressions
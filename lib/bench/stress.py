@@ -0,0 +1,157 @@
+# lib/bench/stress.py
+#
+# Concurrent load against one database file:
+#
+#     python -m lib.bench.stress --writers 2 --readers 1,2,4,8 --processes 2
+#
+# Every writer thread calls Article.create and every reader thread calls
+# Article.find_by_author, ``ops`` times each, in this process and in each of
+# ``processes`` extra ones. Any exception counts as a failure; the report
+# gives reads/s and writes/s for each reader count.
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from lib.db import connection
+from lib.db.connection import get_connection_cm, using_database
+from lib.models.article import Article
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+
+AUTHORS = 50
+MAGAZINES = 10
+
+
+def prepare(db_path):
+    """Make sure ``db_path`` has authors and magazines to write against."""
+    from lib.db.migrate import upgrade
+    upgrade(db_path)
+    with using_database(db_path), get_connection_cm() as conn:
+        if conn.execute("SELECT COUNT(*) FROM authors").fetchone()[0] < AUTHORS:
+            Author.create_many((f"Stress author {i}",) for i in range(AUTHORS))
+        if conn.execute("SELECT COUNT(*) FROM magazines").fetchone()[0] < MAGAZINES:
+            Magazine.create_many((f"Stress magazine {i}", "Stress") for i in range(MAGAZINES))
+
+
+def hammer(db_path, writers=2, readers=4, ops=200, seed=0):
+    """Run writer and reader threads against ``db_path`` in this process."""
+    # One pooled connection per thread, so readers never queue on the pool.
+    saved_pool_size = connection.POOL_SIZE
+    connection.POOL_SIZE = max(saved_pool_size, writers + readers)
+    try:
+        with using_database(db_path):
+            return _hammer(writers, readers, ops, seed)
+    finally:
+        connection.POOL_SIZE = saved_pool_size
+
+
+def _hammer(writers, readers, ops, seed):
+    with get_connection_cm() as conn:
+        author_ids = [row[0] for row in conn.execute("SELECT id FROM authors")]
+        magazine_ids = [row[0] for row in conn.execute("SELECT id FROM magazines")]
+    errors = []
+    counts = {"writes": 0, "reads": 0}
+    # Seconds until the last thread of each kind finished.
+    finished = {"writes": 0.0, "reads": 0.0}
+    lock = threading.Lock()
+
+    def worker(kind, number):
+        rng = random.Random(f"{seed}-{os.getpid()}-{kind}-{number}")
+        done = 0
+        try:
+            for i in range(ops):
+                if kind == "writes":
+                    Article.create(f"Stress {os.getpid()}-{number}-{i}",
+                                   rng.choice(author_ids), rng.choice(magazine_ids))
+                else:
+                    Article.find_by_author(rng.choice(author_ids))
+                done += 1
+        except Exception as exc:
+            errors.append(f"{kind}[{number}]: {type(exc).__name__}: {exc}")
+        with lock:
+            counts[kind] += done
+            finished[kind] = max(finished[kind], time.perf_counter() - started)
+
+    threads = [threading.Thread(target=worker, args=("writes", n)) for n in range(writers)]
+    threads += [threading.Thread(target=worker, args=("reads", n)) for n in range(readers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return dict(counts, errors=errors, write_seconds=finished["writes"], read_seconds=finished["reads"])
+
+
+def _child(db_path, writers, readers, ops, seed, results):
+    results.put(hammer(db_path, writers, readers, ops, seed))
+
+
+def run(db_path, writers=2, readers=4, ops=200, processes=0, seed=0):
+    """hammer() in this process and in ``processes`` others at the same time."""
+    import multiprocessing
+    prepare(db_path)
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    children = [context.Process(target=_child, args=(db_path, writers, readers, ops, seed + n, results))
+                for n in range(1, processes + 1)]
+    for child in children:
+        child.start()
+    reports = [hammer(db_path, writers, readers, ops, seed)]
+    reports += [results.get() for _ in children]
+    for child in children:
+        child.join()
+        if child.exitcode:
+            reports.append({"writes": 0, "reads": 0, "write_seconds": 0, "read_seconds": 0,
+                            "errors": [f"process exited with {child.exitcode}"]})
+    totals = {}
+    for kind in ("writes", "reads"):
+        done = sum(report[kind] for report in reports)
+        seconds = max(report[kind[:-1] + "_seconds"] for report in reports)
+        totals[kind] = done
+        totals[kind + "_per_second"] = round(done / seconds) if seconds else None
+    return {
+        "writers": writers * (processes + 1),
+        "readers": readers * (processes + 1),
+        **totals,
+        "errors": [error for report in reports for error in report["errors"]],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hammer the model layer from many threads and processes.")
+    parser.add_argument("--db", help="database to use (default: a scratch copy is created and removed)")
+    parser.add_argument("--writers", type=int, default=2, help="writer threads per process")
+    parser.add_argument("--readers", default="1,2,4,8", help="comma-separated reader thread counts to try")
+    parser.add_argument("--processes", type=int, default=0, help="extra processes running the same load")
+    parser.add_argument("--ops", type=int, default=500, help="calls per thread")
+    args = parser.parse_args(argv)
+
+    workdir = None
+    db_path = args.db
+    if db_path is None:
+        workdir = tempfile.mkdtemp(prefix="articles-stress-")
+        db_path = os.path.join(workdir, "stress.db")
+    failed = False
+    try:
+        for readers in (int(n) for n in args.readers.split(",")):
+            report = run(db_path, args.writers, readers, args.ops, args.processes)
+            print(f"readers={report['readers']:<3} writers={report['writers']:<3} "
+                  f"reads/s={report['reads_per_second'] or '-':<8} "
+                  f"writes/s={report['writes_per_second'] or '-':<8} errors={len(report['errors'])}")
+            for error in report["errors"][:5]:
+                print("  " + error)
+            failed = failed or bool(report["errors"])
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
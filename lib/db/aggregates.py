@@ -0,0 +1,63 @@
+# lib/db/aggregates.py
+#
+# Checks and repairs the trigger-maintained count tables from migration
+# 0004 against the articles table they summarise.
+
+from lib.db.connection import get_connection_cm
+
+# Each entry: aggregate table, its key columns, the stored count columns and
+# the GROUP BY over articles that says what they should hold. Magazines come
+# last: the author_magazine_counts triggers adjust magazine rows, so those
+# are recomputed after the pairs.
+AGGREGATES = [
+    (
+        "author_article_counts", ("author_id",), ("article_count",),
+        "SELECT author_id, COUNT(*) FROM articles WHERE author_id IS NOT NULL GROUP BY author_id",
+    ),
+    (
+        "author_magazine_counts", ("author_id", "magazine_id"), ("article_count",),
+        "SELECT author_id, magazine_id, COUNT(*) FROM articles"
+        " WHERE author_id IS NOT NULL AND magazine_id IS NOT NULL GROUP BY author_id, magazine_id",
+    ),
+    (
+        "magazine_article_counts", ("magazine_id",), ("article_count", "author_count"),
+        "SELECT magazine_id, COUNT(*), COUNT(DISTINCT author_id) FROM articles"
+        " WHERE magazine_id IS NOT NULL GROUP BY magazine_id",
+    ),
+]
+
+
+def _load(conn, sql, key_width):
+    return {tuple(row[:key_width]): tuple(row[key_width:]) for row in conn.execute(sql)}
+
+
+def verify(db_path=None):
+    """Return a list of (table, key, stored, expected) rows that disagree."""
+    drift = []
+    with get_connection_cm(db_path) as conn:
+        for table, keys, counts, expected_sql in AGGREGATES:
+            stored = _load(conn, f"SELECT {', '.join(keys + counts)} FROM {table}", len(keys))
+            expected = _load(conn, expected_sql, len(keys))
+            for key in sorted(stored.keys() | expected.keys()):
+                if stored.get(key) != expected.get(key):
+                    drift.append((table, key, stored.get(key), expected.get(key)))
+    return drift
+
+
+def recompute(conn):
+    """Refill every aggregate table from articles on ``conn``; the caller commits."""
+    conn.execute("DELETE FROM magazine_article_counts")
+    for table, keys, counts, expected_sql in AGGREGATES:
+        conn.execute(f"DELETE FROM {table}")
+        conn.execute(f"INSERT INTO {table} ({', '.join(keys + counts)}) {expected_sql}")
+
+
+def rebuild(db_path=None):
+    """Recompute every aggregate table from articles in one transaction."""
+    with get_connection_cm(db_path) as conn:
+        try:
+            recompute(conn)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
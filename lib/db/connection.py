@@ -1,17 +1,1169 @@
 # lib/db/connection.py
+#
+# Concurrency model
+#
+# * Connections come from a bounded pool per (database, profile) and are
+#   used by one thread at a time. A thread keeps the connection it checked
+#   out until its outermost get_connection_cm()/transaction() block exits,
+#   so nested model calls share it; sqlite3 objects are never used by two
+#   threads at once even though check_same_thread is off for the pool.
+# * All profiles run in WAL mode: any number of readers proceed alongside
+#   one writer, and reads never wait on writes.
+# * Writes take the write lock up front. The implicit transaction sqlite3
+#   opens before an INSERT/UPDATE/DELETE is BEGIN IMMEDIATE, and so is the
+#   one transaction() opens, so a transaction never starts as a reader and
+#   then fails to upgrade (which SQLite reports as "database is locked"
+#   without waiting).
+# * A writer that finds the lock taken waits up to BUSY_TIMEOUT seconds
+#   (SQLite's busy handler). Model write methods are wrapped in
+#   retry_on_busy, which retries the whole method with exponential backoff
+#   if that wait runs out, unless it runs inside an enclosing transaction,
+#   whose owner has to decide.
+# * Separate processes coordinate through SQLite's file locks the same way.
+# * Model read methods ask for get_connection_cm(readonly=True) and get a
+#   connection from a separate reader pool, opened with mode=ro and
+#   query_only, so reads never take a writer's pool slot and cannot write
+#   by mistake. A thread that already holds a read-write connection (inside
+#   transaction(), say) keeps reading on it and sees its own uncommitted
+#   changes. With enable_read_snapshot() the readers use a copy of the
+#   database refreshed in the background instead, and never touch the
+#   file writers are working on.
+# * With enable_memory_mode() every model query runs against an in-memory
+#   copy of the database instead (see "Memory mode" below).
 
+import atexit
+import bisect
+import functools
+import os
 import sqlite3
+import sys
+import threading
+import time
+import types
 from contextlib import contextmanager
 
-def get_connection(db_path="lib/db/database.db"):
-    conn = sqlite3.connect(db_path)
+DB_PATH = "lib/db/database.db"
+
+POOL_SIZE = 5
+POOL_TIMEOUT = 30.0
+
+# Seconds SQLite waits for another connection's write lock, then how often
+# and how patiently retry_on_busy starts the write over.
+BUSY_TIMEOUT = 5.0
+BUSY_RETRIES = 5
+BUSY_BACKOFF = 0.05
+
+
+# Named PRAGMA sets applied once when a connection is opened; pooled
+# connections keep them for their whole life, so checkouts do not pay for
+# the setup again. All profiles use WAL so readers never block on a writer.
+PROFILES = {
+    "read-heavy": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,      # KiB, i.e. 64 MiB of page cache
+        "mmap_size": 268435456,    # serve large scans from a 256 MiB mapping
+        "temp_store": "MEMORY",
+    },
+    "bulk-load": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -262144,
+        "temp_store": "MEMORY",
+    },
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "temp_store": "MEMORY",
+    },
+}
+DEFAULT_PROFILE = "read-heavy"
+PROFILE_ENV = "ARTICLES_DB_PROFILE"
+
+
+class PoolTimeout(sqlite3.OperationalError):
+    pass
+
+
+class TransactionRolledBack(sqlite3.OperationalError):
+    pass
+
+
+class SchemaOutOfDate(sqlite3.OperationalError):
+    pass
+
+
+class TransactionalConnection(sqlite3.Connection):
+    """Connection whose commit() and rollback() defer to an open transaction().
+
+    Outside transaction() they behave as usual. Inside, a commit() issued by
+    a model method is a no-op, since the enclosing block commits once at the
+    end, and a rollback() marks the whole transaction to be rolled back.
+    """
+
+    _depth = 0
+    _rollback_only = False
+
+    def commit(self):
+        if not self._depth:
+            super().commit()
+
+    def rollback(self):
+        if self._depth:
+            self._rollback_only = True
+        else:
+            super().rollback()
+
+
+def resolve_profile(profile=None):
+    name = profile or os.environ.get(PROFILE_ENV) or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"unknown connection profile {name!r}; expected one of {sorted(PROFILES)}")
+    return name
+
+
+# Settings a read-only connection cannot or need not change.
+_WRITE_PRAGMAS = ("journal_mode", "synchronous")
+
+
+def _setup_connection(conn, profile, readonly=False):
     conn.row_factory = sqlite3.Row
+    for name, value in PROFILES[profile].items():
+        if not (readonly and name in _WRITE_PRAGMAS):
+            conn.execute(f"PRAGMA {name} = {value}")
+    if readonly:
+        conn.execute("PRAGMA query_only = ON")
+    if instrumentation.enabled:
+        conn.set_trace_callback(instrumentation.trace)
     return conn
 
+
+def _open(db_path, profile, readonly=False, **kwargs):
+    # Instrumented connections are only created while instrumentation is
+    # on (toggling it recycles the pools), so plain connections pay nothing.
+    instrumented = instrumentation.enabled or slow_query_log.enabled
+    factory = InstrumentedConnection if instrumented else TransactionalConnection
+    in_memory = db_path.startswith(MEMORY_URI_PREFIX)
+    if in_memory:
+        kwargs["uri"] = True
+    elif readonly:
+        from urllib.parse import quote
+        db_path = f"file:{quote(os.path.abspath(db_path))}?mode=ro"
+        kwargs["uri"] = True
+    conn = sqlite3.connect(db_path, factory=factory, timeout=BUSY_TIMEOUT,
+                           isolation_level="IMMEDIATE", **kwargs)
+    if in_memory:
+        # Shared-cache tables are locked per connection and SQLite does not
+        # wait on those locks, so a read overlapping any write would fail
+        # at once. Reads skip the table locks instead (see Memory mode).
+        conn.execute("PRAGMA read_uncommitted = ON")
+    return _setup_connection(conn, profile, readonly)
+
+
+class ConnectionPool:
+    """Bounded pool of sqlite3 connections for one database file.
+
+    Connections are handed out to one thread at a time. A thread that
+    already holds a connection from this pool gets the same one back when
+    it asks again, so nested model calls never wait on themselves.
+    """
+
+    def __init__(self, db_path, profile=None, max_size=None, timeout=POOL_TIMEOUT, readonly=False):
+        self.db_path = db_path
+        self.profile = resolve_profile(profile)
+        self.readonly = readonly
+        self.max_size = max_size or POOL_SIZE
+        self.timeout = timeout
+        self._idle = []
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._local = threading.local()
+
+    def _connect(self):
+        return _open(self.db_path, self.profile, self.readonly, check_same_thread=False)
+
+    @staticmethod
+    def _healthy(conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def checkout(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._cond:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeout(
+                            f"no connection to {self.db_path} available after {self.timeout}s"
+                        )
+                    self._cond.wait(remaining)
+                if self._idle:
+                    conn = self._idle.pop()
+                else:
+                    self._size += 1
+                    conn = None
+
+            if conn is None:
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            if self._healthy(conn):
+                return conn
+            self._discard(conn)
+
+    def checkin(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        with self._cond:
+            if self._closed:
+                conn.close()
+                self._size -= 1
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        # [conn, users]: the connection goes back to the pool when the last
+        # user on this thread is done, whichever order they finish in
+        # (e.g. two interleaved streaming generators).
+        held = getattr(self._local, "held", None)
+        if held is None:
+            held = self._local.held = [self.checkout(), 0]
+        held[1] += 1
+        try:
+            yield held[0]
+        finally:
+            held[1] -= 1
+            if held[1] == 0:
+                self._local.held = None
+                self.checkin(held[0])
+
+    def held(self):
+        """The connection this thread currently holds from the pool, or None."""
+        held = getattr(self._local, "held", None)
+        return held[0] if held else None
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for conn in idle:
+            conn.close()
+
+    def stats(self):
+        with self._cond:
+            return {"size": self._size, "idle": len(self._idle), "max_size": self.max_size}
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+# Databases whose schema version has been checked since the pools were last
+# closed.
+_checked = set()
+
+
+def check_schema(db_path):
+    """Raise SchemaOutOfDate unless ``db_path`` has every migration applied.
+
+    Migrations are never applied implicitly: run ``python -m
+    lib.scripts.upgrade`` (the seeder and the test helpers do it as well).
+    """
+    from urllib.parse import quote
+
+    from lib.db.migrate import discover_migrations
+    latest = max((number for number, _, _ in discover_migrations()), default=0)
+    try:
+        conn = sqlite3.connect(f"file:{quote(os.path.abspath(db_path))}?mode=ro", uri=True)
+        try:
+            version = conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+        finally:
+            conn.close()
+    except sqlite3.OperationalError:  # no such file, or no schema_version table
+        version = 0
+    if version < latest:
+        raise SchemaOutOfDate(
+            f"{db_path} is at schema version {version}, the models need {latest};"
+            f" run python -m lib.scripts.upgrade --db {db_path}")
+
+
+def get_pool(db_path=None, profile=None, readonly=False):
+    db_path = db_path or DB_PATH
+    memory = _memory
+    if memory is not None and memory.db_path == db_path:
+        db_path = memory.uri
+    key = (db_path, resolve_profile(profile), readonly)
+    # The memory copy's file was checked when memory mode was enabled.
+    if key[0] not in _checked and not key[0].startswith(MEMORY_URI_PREFIX):
+        check_schema(key[0])
+        _checked.add(key[0])
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(key[0], key[1], readonly=readonly)
+        return pool
+
+
+def _close_reader_pools(db_path):
+    with _pools_lock:
+        pools = [_pools.pop(key) for key in list(_pools) if key[0] == db_path and key[2]]
+    for pool in pools:
+        pool.close()
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+        _checked.clear()
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(close_pools)
+
+
+def _require_no_connection(action):
+    """Raise RuntimeError if this thread holds a pooled connection.
+
+    Switching modes closes the pools. A connection or transaction() held
+    across the switch would be orphaned, and the next nested model call
+    would check out a second writer that waits on the first one's lock.
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+    if any(pool.held() is not None for pool in pools):
+        raise RuntimeError(f"{action} needs every connection and transaction on this thread to be closed first")
+
+
 @contextmanager
-def get_connection_cm(db_path="lib/db/database.db"):
-    conn = get_connection(db_path)
+def using_database(db_path):
+    """Point the models at ``db_path`` for the block, then back.
+
+    Pools are closed on the way in and out, so no connection to the other
+    database is handed out.
+    """
+    global DB_PATH
+    _require_no_connection("using_database()")
+    saved_db_path = DB_PATH
+    close_pools()
+    DB_PATH = db_path
     try:
+        yield db_path
+    finally:
+        close_pools()
+        DB_PATH = saved_db_path
+
+
+def get_connection(db_path=None, profile=None):
+    return _open(db_path or DB_PATH, resolve_profile(profile))
+
+@contextmanager
+def get_connection_cm(db_path=None, profile=None, readonly=False):
+    """Hold a pooled connection for the block.
+
+    ``readonly=True`` is for model reads: the connection comes from the
+    reader pool (or the read snapshot), unless this thread already holds a
+    read-write connection, whose uncommitted changes the read must see.
+    """
+    pool = get_pool(db_path, profile)
+    if readonly and pool.held() is None:
+        pool = get_pool(_read_path(pool.db_path), profile, readonly=True)
+    with pool.connection() as conn:
         yield conn
+
+
+@contextmanager
+def transaction(db_path=None, profile=None, immediate=True):
+    """Run a block as one unit of work on one connection.
+
+    The connection stays held by this thread for the whole block, so every
+    model call inside it (they all use get_connection_cm()) runs on it and
+    their commits are deferred to a single COMMIT when the block exits. An
+    exception rolls everything back. Nested blocks become savepoints: an
+    exception inside one undoes only that block's work.
+
+    The block starts with BEGIN IMMEDIATE, taking the write lock before the
+    first read so it cannot later fail to upgrade; pass ``immediate=False``
+    for a block that only reads and should not hold writers off.
+
+        with transaction():
+            author = Author.create("Ann")
+            author.add_article(magazine, "First post")
+    """
+    with get_pool(db_path, profile).connection() as conn:
+        depth = conn._depth
+        savepoint = f"articles_sp_{depth}"
+        if depth:
+            conn.execute(f"SAVEPOINT {savepoint}")
+        elif not conn.in_transaction:
+            _begin(conn, "BEGIN IMMEDIATE" if immediate else "BEGIN")
+        conn._depth = depth + 1
+        try:
+            yield conn
+        except BaseException:
+            conn._depth = depth
+            if depth:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+            else:
+                _abort(conn)
+            raise
+        conn._depth = depth
+        if depth:
+            conn.execute(f"RELEASE {savepoint}")
+        elif conn._rollback_only:
+            _abort(conn)
+            raise TransactionRolledBack("transaction was rolled back by a rollback() inside it")
+        else:
+            conn.commit()
+
+
+# --- Read snapshot ---------------------------------------------------------
+#
+#     enable_read_snapshot(interval=30)
+#
+# Readers then query a copy of the database made with the backup API and
+# replaced every ``interval`` seconds, so analytics reads never share a
+# file, its locks or its WAL with ingestion. They see data up to one
+# interval old; reads inside a write transaction still see the live data.
+
+SNAPSHOT_INTERVAL = 60.0
+
+
+class ReadSnapshot:
+    """A periodically refreshed copy of ``db_path`` for read-only connections."""
+
+    def __init__(self, db_path, path=None, interval=SNAPSHOT_INTERVAL):
+        self.db_path = db_path
+        self.path = path or db_path + ".snapshot"
+        self.interval = interval
+        self.refreshed_at = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        """Copy the database now; new reader connections see the copy."""
+        with self._lock:
+            partial = self.path + ".partial"
+            if os.path.exists(partial):
+                os.remove(partial)
+            target = sqlite3.connect(partial)
+            try:
+                with get_pool(self.db_path, readonly=True).connection() as source:
+                    source.backup(target)
+                # A rollback journal rather than WAL: the copy is only ever
+                # replaced, and read-only connections need no -shm file.
+                target.execute("PRAGMA journal_mode = DELETE")
+            finally:
+                target.close()
+            os.replace(partial, self.path)
+            # Pooled readers still have the previous copy open; queries
+            # already running finish on it and idle ones are dropped.
+            _close_reader_pools(self.path)
+            self.refreshed_at = time.time()
+
+    def start(self):
+        self.refresh()
+        self._thread = threading.Thread(target=self._run, name="read-snapshot", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except (sqlite3.Error, OSError) as exc:
+                # Keep serving the previous copy; the next interval retries.
+                print(f"read snapshot refresh failed: {exc}", file=sys.stderr)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        _close_reader_pools(self.path)
+        for path in (self.path, self.path + ".partial"):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+_snapshot = None
+
+
+def _read_path(db_path):
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.db_path == db_path:
+        return snapshot.path
+    return db_path
+
+
+def enable_read_snapshot(interval=SNAPSHOT_INTERVAL, db_path=None, path=None):
+    """Point model reads at a copy of the database refreshed every ``interval`` seconds."""
+    global _snapshot
+    _require_no_connection("enable_read_snapshot()")
+    disable_read_snapshot()
+    snapshot = ReadSnapshot(db_path or DB_PATH, path, interval)
+    snapshot.start()
+    _snapshot = snapshot
+    return snapshot
+
+
+def disable_read_snapshot():
+    """Send model reads back to the live database and remove the copy."""
+    global _snapshot
+    if _snapshot is None:
+        return
+    _require_no_connection("disable_read_snapshot()")
+    snapshot, _snapshot = _snapshot, None
+    snapshot.stop()
+
+
+# --- Memory mode -----------------------------------------------------------
+#
+#     enable_memory_mode(interval=300)
+#
+# For read-mostly nodes: the database file is copied into a shared-cache
+# in-memory database with the backup API, and every pool for that file
+# opens connections to the copy instead, so queries never touch the disk.
+# Writes land in memory and reach the file on checkpoint(): every
+# ``interval`` seconds if one is given, and when memory mode is turned off
+# (including at exit). A crash loses writes since the last checkpoint.
+#
+# Shared-cache connections lock whole tables and SQLite does not wait on
+# those locks, so memory connections read with read_uncommitted: reads
+# never block or fail on a write, but can see rows of a write transaction
+# that has not committed yet. Concurrent writers still take turns, with
+# retry_on_busy retrying the ones that find the cache locked.
+#
+# The file is overwritten by each checkpoint, so only this process should
+# write to it while memory mode is on.
+
+MEMORY_URI_PREFIX = "file:articles-memory-"
+
+
+class MemoryDatabase:
+    """``db_path`` held in a shared-cache in-memory database."""
+
+    _count = 0
+
+    def __init__(self, db_path, interval=None):
+        MemoryDatabase._count += 1
+        self.db_path = db_path
+        self.uri = f"{MEMORY_URI_PREFIX}{os.getpid()}-{MemoryDatabase._count}?mode=memory&cache=shared"
+        self.interval = interval
+        self.checkpointed_at = None
+        self._anchor = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def load(self):
+        # The in-memory database lives as long as one connection to it is
+        # open; the anchor is that connection.
+        self._anchor = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+        source = get_connection(self.db_path)
+        try:
+            source.backup(self._anchor)
+        finally:
+            source.close()
+        if self.interval:
+            self._thread = threading.Thread(target=self._run, name="memory-checkpoint", daemon=True)
+            self._thread.start()
+
+    def checkpoint(self):
+        """Copy the in-memory database over the file now."""
+        with self._lock:
+            target = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT)
+            try:
+                # One backup step: it waits for a write in progress to
+                # commit, and writes made while it copies are carried over,
+                # so the file always gets a committed state.
+                self._anchor.backup(target)
+            finally:
+                target.close()
+            self.checkpointed_at = time.time()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.checkpoint()
+            except (sqlite3.Error, OSError) as exc:
+                print(f"memory checkpoint failed: {exc}", file=sys.stderr)
+
+    def close(self, persist=True):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if persist:
+            self.checkpoint()
+
+
+_memory = None
+
+
+def enable_memory_mode(db_path=None, interval=None):
+    """Serve every query on ``db_path`` from an in-memory copy of it.
+
+    ``interval`` (seconds) checkpoints the copy back to the file
+    periodically; checkpoint_memory() does it on demand.
+    """
+    global _memory
+    _require_no_connection("enable_memory_mode()")
+    db_path = db_path or DB_PATH
+    disable_memory_mode()
+    check_schema(db_path)
+    memory = MemoryDatabase(db_path, interval)
+    memory.load()
+    # Connections already pooled for the file would bypass the copy.
+    close_pools()
+    _memory = memory
+    return memory
+
+
+def checkpoint_memory():
+    if _memory is None:
+        raise RuntimeError("memory mode is not enabled")
+    _memory.checkpoint()
+
+
+def disable_memory_mode(persist=True):
+    """Checkpoint (unless ``persist`` is false) and go back to the file."""
+    global _memory
+    memory = _memory
+    if memory is None:
+        return
+    _require_no_connection("disable_memory_mode()")
+    try:
+        memory.close(persist)
     finally:
-        conn.close()
+        _memory = None
+        close_pools()
+        memory._anchor.close()
+
+
+atexit.register(disable_memory_mode)
+
+
+def is_busy(exc):
+    """Whether ``exc`` is SQLite reporting a lock held by another connection."""
+    return isinstance(exc, sqlite3.OperationalError) and str(exc).startswith(
+        ("database is locked", "database table is locked"))
+
+
+def _backoff(attempt):
+    import random
+    time.sleep(BUSY_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+
+def _begin(conn, sql):
+    for attempt in range(BUSY_RETRIES + 1):
+        try:
+            conn.execute(sql)
+            return
+        except sqlite3.OperationalError as exc:
+            if not is_busy(exc) or attempt == BUSY_RETRIES:
+                raise
+        _backoff(attempt)
+
+
+def retry_on_busy(fn):
+    """Retry a self-contained write when the database stays locked.
+
+    Only used on methods that run one transaction of their own; when called
+    inside transaction() the error propagates, since only the whole block
+    can be retried.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        for attempt in range(BUSY_RETRIES + 1):
+            try:
+                return fn(*args, **kwargs)
+            except sqlite3.OperationalError as exc:
+                if not is_busy(exc) or attempt == BUSY_RETRIES or _in_unit_of_work():
+                    raise
+            _backoff(attempt)
+    return wrapper
+
+
+def _in_unit_of_work():
+    held = get_pool().held()
+    return held is not None and held._depth > 0
+
+
+def _abort(conn):
+    conn._rollback_only = False
+    conn.rollback()
+    # Instances cached during the block may hold rolled-back state.
+    from lib.models.identity_map import identity_map
+    if identity_map.enabled:
+        identity_map.evict_all()
+
+
+# --- Instrumentation -------------------------------------------------------
+#
+# Opt-in per-statement and per-model-method latency counters. Enable with
+# enable_instrumentation() (or ARTICLES_INSTRUMENT=1 for the CLI), read them
+# with instrumentation_stats() and print them with dump_instrumentation_stats().
+
+INSTRUMENT_ENV = "ARTICLES_INSTRUMENT"
+LATENCY_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+
+# Patterns are compiled on first use (re's own cache keeps them) so that
+# importing this module does not pay for the re package.
+_SQL_LITERAL = r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b"
+_WHITESPACE = r"\s+"
+
+
+def normalize_sql(sql):
+    """Collapse whitespace and replace literals with ? so that statements
+    differing only in their values are counted together."""
+    import re
+
+    sql = re.sub(_SQL_LITERAL, "?", sql)
+    return re.sub(_WHITESPACE, " ", sql).strip().rstrip(";").strip()
+
+
+class LatencyStat:
+    __slots__ = ("calls", "total_ms", "max_ms", "rows", "histogram")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def observe(self, elapsed_ms, rows):
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows
+        self.histogram[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+    def as_dict(self):
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "calls": self.calls,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.calls, 4) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "rows": self.rows,
+            "histogram": {label: n for label, n in zip(labels, self.histogram) if n},
+        }
+
+
+class Instrumentation:
+    # from_row is a per-row callback, not a query; timing it would only
+    # measure the wrapper.
+    SKIP_METHODS = {"from_row"}
+
+    def __init__(self):
+        self.enabled = False
+        self.sql = {}
+        self.methods = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._wrapped = []
+
+    def observe_sql(self, sql, elapsed_ms, rows):
+        with self._lock:
+            stat = self.sql.get(sql)
+            if stat is None:
+                stat = self.sql[sql] = LatencyStat()
+            stat.observe(elapsed_ms, rows)
+
+    def observe_method(self, name, elapsed_ms, rows):
+        with self._lock:
+            stat = self.methods.get(name)
+            if stat is None:
+                stat = self.methods[name] = LatencyStat()
+            stat.observe(elapsed_ms, rows)
+
+    def trace(self, statement):
+        # Statements run through a TimedCursor are already timed there; the
+        # trace callback picks up the rest (COMMIT, executescript, ...) as
+        # count-only entries.
+        if getattr(self._local, "in_cursor", False):
+            return
+        self.observe_sql(normalize_sql(statement), 0.0, 0)
+
+    def reset(self):
+        with self._lock:
+            self.sql = {}
+            self.methods = {}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "sql": {sql: stat.as_dict() for sql, stat in self.sql.items()},
+                "methods": {name: stat.as_dict() for name, stat in self.methods.items()},
+            }
+
+    def _wrap_models(self):
+        from lib.models.article import Article
+        from lib.models.author import Author
+        from lib.models.magazine import Magazine
+        for cls in (Article, Author, Magazine):
+            for name, descriptor in list(vars(cls).items()):
+                if name.startswith("_") or name in self.SKIP_METHODS:
+                    continue
+                if isinstance(descriptor, classmethod):
+                    wrapped = classmethod(self._timed(f"{cls.__name__}.{name}", descriptor.__func__))
+                elif callable(descriptor) and not isinstance(descriptor, staticmethod):
+                    wrapped = self._timed(f"{cls.__name__}.{name}", descriptor)
+                else:
+                    continue
+                self._wrapped.append((cls, name, descriptor))
+                setattr(cls, name, wrapped)
+
+    def _unwrap_models(self):
+        while self._wrapped:
+            cls, name, descriptor = self._wrapped.pop()
+            setattr(cls, name, descriptor)
+
+    def _timed(self, label, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            result = func(*args, **kwargs)
+            elapsed = time.perf_counter() - started
+            if isinstance(result, types.GeneratorType):
+                return self._timed_stream(label, elapsed, result)
+            if isinstance(result, list):
+                rows = len(result)
+            elif hasattr(result, "next_cursor"):  # pagination.Page
+                rows = len(result.items)
+            else:
+                rows = 0 if result is None else 1
+            self.observe_method(label, elapsed * 1000, rows)
+            return result
+        return wrapper
+
+    def _timed_stream(self, label, elapsed, stream):
+        # iter_* methods do their work as they are iterated: count what they
+        # yield and the time spent producing it (not the caller's time
+        # between rows), and record the call when the stream ends or is
+        # closed.
+        rows = 0
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(stream)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - started
+                rows += 1
+                yield item
+        finally:
+            stream.close()
+            self.observe_method(label, elapsed * 1000, rows)
+
+
+instrumentation = Instrumentation()
+
+
+# --- Slow-query log ----------------------------------------------------------
+#
+# Statements slower than the threshold are written to a rotating file with
+# their parameter shape, duration and EXPLAIN QUERY PLAN. Plans that scan the
+# whole articles table are flagged, since that is what grows with the data.
+
+SLOW_QUERY_ENV = "ARTICLES_SLOW_QUERY_MS"
+SLOW_QUERY_LOG = "lib/db/slow_queries.log"
+SLOW_QUERY_MAX_BYTES = 1_000_000
+SLOW_QUERY_BACKUPS = 3
+
+_SCAN = r"\bSCAN (?:TABLE )?(\w+)"
+# "FROM articles ar" / "JOIN articles AS ar": plans name a table by its alias.
+_ARTICLES_REF = (r"(?:\bFROM|\bJOIN|,)\s+articles\b(?:\s+(?:AS\s+)?"
+                 r"(?!(?:WHERE|ON|USING|JOIN|LEFT|RIGHT|FULL|INNER|OUTER|CROSS|NATURAL|INDEXED|NOT"
+                 r"|GROUP|ORDER|LIMIT|HAVING|WINDOW|UNION|EXCEPT|INTERSECT|RETURNING)\b)(\w+))?")
+
+
+class ExecuteMany(int):
+    """Parameter placeholder for executemany: the number of rows affected."""
+
+
+def parameter_shape(parameters):
+    """Describe parameters by type only, so values never reach the log."""
+    if isinstance(parameters, ExecuteMany):
+        return f"executemany rowcount={int(parameters)}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+
+
+class SlowQueryLog:
+    def __init__(self):
+        self.threshold_ms = None
+        self.flagged = 0
+        self.logger = None
+        self._handler = None
+
+    @property
+    def enabled(self):
+        return self.threshold_ms is not None
+
+    def configure(self, threshold_ms, path, max_bytes, backup_count):
+        # logging pulls in socket, pickle and friends; only pay for it here.
+        import logging.handlers
+
+        self.close()
+        self.logger = logging.getLogger("lib.db.slow_queries")
+        self.logger.propagate = False
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        self._handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+        self.logger.addHandler(self._handler)
+        self.logger.setLevel(logging.INFO)
+        self.threshold_ms = threshold_ms
+
+    def close(self):
+        self.threshold_ms = None
+        if self._handler is not None:
+            self.logger.removeHandler(self._handler)
+            self._handler.close()
+            self._handler = None
+
+    def explain(self, conn, sql, parameters):
+        if isinstance(parameters, ExecuteMany):
+            return []
+        # Connection.execute on the base class returns a plain cursor, so the
+        # EXPLAIN itself is neither timed nor logged.
+        instrumentation._local.in_cursor = True
+        try:
+            rows = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+        except (sqlite3.Error, ValueError):
+            return []
+        finally:
+            instrumentation._local.in_cursor = False
+        return [row[-1] for row in rows]
+
+    def record(self, conn, sql, parameters, elapsed_ms, rows):
+        import logging
+        import re
+
+        plan = self.explain(conn, sql, parameters)
+        names = {"articles"}
+        names.update(alias.lower() for alias in re.findall(_ARTICLES_REF, sql, re.IGNORECASE) if alias)
+        full_scan = any(match.lower() in names for detail in plan for match in re.findall(_SCAN, detail))
+        if full_scan:
+            self.flagged += 1
+        lines = [
+            f"{elapsed_ms:.2f} ms rows={rows} params={parameter_shape(parameters)}"
+            + (" FULL SCAN articles" if full_scan else ""),
+            "  " + re.sub(_WHITESPACE, " ", sql).strip(),
+        ]
+        lines.extend(f"  plan: {detail}" for detail in plan)
+        self.logger.log(logging.WARNING if full_scan else logging.INFO, "\n".join(lines))
+
+
+slow_query_log = SlowQueryLog()
+
+
+def enable_slow_query_log(threshold_ms, path=None, max_bytes=SLOW_QUERY_MAX_BYTES,
+                          backup_count=SLOW_QUERY_BACKUPS):
+    """Log statements taking at least ``threshold_ms`` to ``path``."""
+    _require_no_connection("enable_slow_query_log()")
+    slow_query_log.configure(threshold_ms, path or SLOW_QUERY_LOG, max_bytes, backup_count)
+    close_pools()
+
+
+def disable_slow_query_log():
+    if slow_query_log.enabled:
+        _require_no_connection("disable_slow_query_log()")
+        slow_query_log.close()
+        close_pools()
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that reports each statement's latency and row count.
+
+    A statement's time includes the fetches that step through its result,
+    so it is recorded once the rows are exhausted, the cursor re-executes
+    or the cursor goes away.
+    """
+
+    _pending = None
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        sql, elapsed_ms, rows, parameters = pending
+        if instrumentation.enabled:
+            instrumentation.observe_sql(normalize_sql(sql), elapsed_ms, rows)
+        if slow_query_log.enabled and elapsed_ms >= slow_query_log.threshold_ms:
+            slow_query_log.record(self.connection, sql, parameters, elapsed_ms, rows)
+
+    def _run(self, method, sql, parameters, many=False):
+        self._finish()
+        started = time.perf_counter()
+        instrumentation._local.in_cursor = True
+        try:
+            method(sql, parameters)
+        finally:
+            instrumentation._local.in_cursor = False
+            # executemany consumes its parameters, so only their count is known.
+            self._pending = [sql, (time.perf_counter() - started) * 1000, 0,
+                             ExecuteMany(self.rowcount) if many else parameters]
+            if self.description is None:
+                self._finish()
+        return self
+
+    def _fetched(self, started, rows, exhausted):
+        pending = self._pending
+        if pending is not None:
+            pending[1] += (time.perf_counter() - started) * 1000
+            pending[2] += rows
+            if exhausted:
+                self._finish()
+
+    def execute(self, sql, parameters=()):
+        return self._run(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._run(super().executemany, sql, seq_of_parameters, many=True)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(started, len(rows), len(rows) < (self.arraysize if size is None else size))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows), True)
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(started, 0, True)
+            raise
+        self._fetched(started, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()
+
+
+class InstrumentedConnection(TransactionalConnection):
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def enable_instrumentation():
+    if instrumentation.enabled:
+        return
+    _require_no_connection("enable_instrumentation()")
+    instrumentation.enabled = True
+    instrumentation._wrap_models()
+    close_pools()
+
+
+def disable_instrumentation():
+    if not instrumentation.enabled:
+        return
+    _require_no_connection("disable_instrumentation()")
+    instrumentation.enabled = False
+    instrumentation._unwrap_models()
+    close_pools()
+
+
+def instrumentation_from_env():
+    if os.environ.get(INSTRUMENT_ENV):
+        enable_instrumentation()
+        install_stats_signal_handler()
+    if os.environ.get(SLOW_QUERY_ENV):
+        enable_slow_query_log(float(os.environ[SLOW_QUERY_ENV]))
+
+
+def instrumentation_stats():
+    return instrumentation.stats()
+
+
+def reset_instrumentation():
+    instrumentation.reset()
+
+
+def format_instrumentation_stats(limit=20):
+    stats = instrumentation.stats()
+    if not stats["enabled"]:
+        return f"Instrumentation is off (set {INSTRUMENT_ENV}=1 or call enable_instrumentation())."
+    lines = []
+    for title, entries in (("Model methods", stats["methods"]), ("SQL statements", stats["sql"])):
+        lines.append(f"{title} (slowest total first)")
+        lines.append(f"{'calls':>7} {'total ms':>10} {'mean ms':>9} {'max ms':>9} {'rows':>8}  name")
+        ranked = sorted(entries.items(), key=lambda item: item[1]["total_ms"], reverse=True)
+        for name, entry in ranked[:limit]:
+            lines.append(
+                f"{entry['calls']:>7} {entry['total_ms']:>10.2f} {entry['mean_ms']:>9.3f}"
+                f" {entry['max_ms']:>9.2f} {entry['rows']:>8}  {name[:100]}"
+            )
+        lines.append("")
+    return "\n".join(lines)
+
+
+def dump_instrumentation_stats(file=None):
+    print(format_instrumentation_stats(), file=file or sys.stderr)
+
+
+def install_stats_signal_handler(signum=None):
+    """Dump the counters to stderr whenever the process receives ``signum``
+    (SIGUSR1 by default), e.g. ``kill -USR1 <pid>``."""
+    import signal
+
+    signum = signum or getattr(signal, "SIGUSR1", None)
+    if signum is None or threading.current_thread() is not threading.main_thread():
+        return False
+    signal.signal(signum, lambda *_: dump_instrumentation_stats())
+    return True
@@ -0,0 +1,238 @@
+# lib/db/importer.py
+#
+# Streaming import of partner feeds:
+#
+#     python -m lib.db.importer articles feed.jsonl --chunk-size 10000
+#
+# Files are CSV (with a header row) or JSONL and are read a record at a time.
+# Every ``chunk_size`` records are inserted and committed together with a
+# checkpoint (the byte offset just past the last record) in the
+# import_checkpoints table, so re-running the same command after an
+# interruption continues from there. Re-running after a finished import
+# only picks up records appended to the file since.
+#
+# Record fields per kind:
+#   authors    name
+#   magazines  name, category
+#   articles   title, and author / magazine by name (author, magazine) or by
+#              id (author_id, magazine_id). Unknown names are created; a new
+#              magazine takes the record's category if it has one.
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from lib.db.connection import get_connection_cm
+
+CHUNK_SIZE = 10_000
+DEFAULT_CATEGORY = "Uncategorized"
+KINDS = ("authors", "magazines", "articles")
+FORMATS = ("csv", "jsonl")
+
+
+class FeedError(ValueError):
+    """A record that cannot be imported; the current chunk is rolled back."""
+
+
+def detect_format(path):
+    return "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def _lines(f, position):
+    """Yield decoded lines, keeping ``position[0]`` at the byte offset after each."""
+    for line in iter(f.readline, b""):
+        position[0] += len(line)
+        yield line.decode("utf-8")
+
+
+def read_feed(f, fmt, start=0):
+    """Yield (record dict, byte offset after the record) from binary file ``f``.
+
+    Reading resumes at byte ``start``; for CSV the header is taken from the
+    top of the file first.
+    """
+    position = [0]
+    if fmt == "csv":
+        header = next(csv.reader(_lines(f, position)), None)
+        if header is None:
+            return
+        if start > position[0]:
+            f.seek(start)
+            position[0] = start
+        for row in csv.reader(_lines(f, position)):
+            if row:
+                yield dict(zip(header, row)), position[0]
+    else:
+        f.seek(start)
+        position[0] = start
+        for line in _lines(f, position):
+            if line.strip():
+                yield json.loads(line), position[0]
+
+
+class Resolver:
+    """Maps author and magazine names to ids, creating unknown ones.
+
+    The whole name -> id table for each is kept in a dictionary, loaded
+    once, so resolving a record never costs a query.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.authors = dict(conn.execute("SELECT name, MIN(id) FROM authors GROUP BY name"))
+        self.magazines = dict(conn.execute("SELECT name, MIN(id) FROM magazines GROUP BY name"))
+
+    def author(self, name):
+        author_id = self.authors.get(name)
+        if author_id is None:
+            author_id = self.conn.execute("INSERT INTO authors (name) VALUES (?)", (name,)).lastrowid
+            self.authors[name] = author_id
+        return author_id
+
+    def magazine(self, name, category=None):
+        magazine_id = self.magazines.get(name)
+        if magazine_id is None:
+            magazine_id = self.conn.execute(
+                "INSERT INTO magazines (name, category) VALUES (?, ?)",
+                (name, category or DEFAULT_CATEGORY)).lastrowid
+            self.magazines[name] = magazine_id
+        return magazine_id
+
+
+def _text(record, field):
+    value = record.get(field)
+    if value is None or value == "":
+        raise FeedError(f"missing {field!r}")
+    return str(value)
+
+
+def _ref(record, resolver, kind):
+    value = record.get(f"{kind}_id")
+    if value not in (None, ""):
+        return int(value)
+    if kind == "author":
+        return resolver.author(_text(record, "author"))
+    return resolver.magazine(_text(record, "magazine"), record.get("category"))
+
+
+INSERTS = {
+    "authors": (
+        "INSERT INTO authors (name) VALUES (?)",
+        lambda record, resolver: (_text(record, "name"),),
+    ),
+    "magazines": (
+        "INSERT INTO magazines (name, category) VALUES (?, ?)",
+        lambda record, resolver: (_text(record, "name"), _text(record, "category")),
+    ),
+    "articles": (
+        "INSERT INTO articles (title, author_id, magazine_id) VALUES (?, ?, ?)",
+        lambda record, resolver: (
+            _text(record, "title"), _ref(record, resolver, "author"), _ref(record, resolver, "magazine")),
+    ),
+}
+
+
+def checkpoint(conn, source):
+    """Return (byte_offset, rows) recorded for ``source``, or (0, 0)."""
+    row = conn.execute(
+        "SELECT byte_offset, rows FROM import_checkpoints WHERE source = ?", (source,)).fetchone()
+    return (row[0], row[1]) if row else (0, 0)
+
+
+def import_file(kind, path, fmt=None, chunk_size=CHUNK_SIZE, db_path=None, restart=False,
+                progress=None):
+    """Stream ``path`` into the ``kind`` table; returns a summary dict.
+
+    ``progress(rows, rows_per_second)`` is called after every committed chunk.
+    """
+    if kind not in INSERTS:
+        raise ValueError(f"unknown import kind {kind!r}; expected one of {', '.join(KINDS)}")
+    fmt = fmt or detect_format(path)
+    source = os.path.abspath(path)
+    sql, build = INSERTS[kind]
+    started = time.perf_counter()
+    imported = 0
+
+    with get_connection_cm(db_path) as conn, open(path, "rb") as f:
+        offset, done = (0, 0) if restart else checkpoint(conn, source)
+        if offset > os.fstat(f.fileno()).st_size:
+            # The file was replaced by a shorter one; start over.
+            offset, done = 0, 0
+        resolver = Resolver(conn) if kind == "articles" else None
+        chunk = []
+        number = done
+
+        def commit(end):
+            nonlocal imported, done
+            conn.executemany(sql, chunk)
+            conn.execute("""
+                INSERT INTO import_checkpoints (source, kind, byte_offset, rows)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (source) DO UPDATE SET
+                    byte_offset = excluded.byte_offset, rows = excluded.rows,
+                    updated_at = CURRENT_TIMESTAMP
+            """, (source, kind, end, done + len(chunk)))
+            conn.commit()
+            imported += len(chunk)
+            done += len(chunk)
+            chunk.clear()
+            if progress:
+                elapsed = time.perf_counter() - started
+                progress(done, imported / elapsed if elapsed else None)
+
+        end = offset
+        try:
+            for record, end in read_feed(f, fmt, offset):
+                number += 1
+                try:
+                    chunk.append(build(record, resolver))
+                except (ValueError, TypeError, AttributeError) as exc:
+                    raise FeedError(f"{path}: record {number}: {exc}") from None
+                if len(chunk) >= chunk_size:
+                    commit(end)
+            if chunk or end != offset:
+                commit(end)
+        except BaseException:
+            conn.rollback()
+            raise
+
+    elapsed = time.perf_counter() - started
+    return {
+        "kind": kind,
+        "imported": imported,
+        "total": done,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(imported / elapsed) if elapsed else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream a CSV or JSONL feed into the database.")
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the file extension, else csv")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="records per commit (default: %(default)s)")
+    parser.add_argument("--db", help="database file (default: the application database)")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and import from the top")
+    args = parser.parse_args(argv)
+
+    def report(rows, rate):
+        print(f"\r{rows} rows ({rate or 0:,.0f} rows/s)", end="", file=sys.stderr, flush=True)
+
+    try:
+        summary = import_file(args.kind, args.path, args.format, args.chunk_size, args.db,
+                              args.restart, progress=report)
+    except (ValueError, OSError) as exc:
+        print(f"\nerror: {exc}", file=sys.stderr)
+        return 2
+    print(f"\nImported {summary['imported']} {args.kind} in {summary['seconds']}s "
+          f"({summary['rows_per_second']} rows/s); {summary['total']} from this file so far.",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
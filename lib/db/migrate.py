@@ -0,0 +1,74 @@
+# lib/db/migrate.py
+
+import os
+import re
+
+from lib.db.connection import get_connection
+
+DB_DIR = os.path.dirname(os.path.abspath(__file__))
+SCHEMA_PATH = os.path.join(DB_DIR, "schema.sql")
+MIGRATIONS_DIR = os.path.join(DB_DIR, "migrations")
+
+MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+
+def discover_migrations(directory=MIGRATIONS_DIR):
+    migrations = []
+    for filename in os.listdir(directory):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    migrations.sort()
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"duplicate migration numbers in {directory}")
+    return migrations
+
+
+def current_version(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.commit()
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def upgrade(db_path=None, target=None):
+    """Bring a database up to the latest (or ``target``) schema version.
+
+    schema.sql is applied first so an empty file gets the base tables; it
+    only uses IF NOT EXISTS and leaves existing data alone. Each migration
+    then runs in its own transaction together with its schema_version row,
+    so an interrupted upgrade resumes at the first unapplied migration.
+    Returns the list of (version, name) pairs that were applied.
+    """
+    conn = get_connection(db_path)
+    applied = []
+    try:
+        with open(SCHEMA_PATH) as f:
+            conn.executescript(f.read())
+        version = current_version(conn)
+        for number, name, path in discover_migrations():
+            if number <= version or (target is not None and number > target):
+                continue
+            with open(path) as f:
+                sql = f.read()
+            try:
+                conn.executescript(
+                    "BEGIN IMMEDIATE;\n"
+                    f"{sql}\n;\n"
+                    f"INSERT INTO schema_version (version, name) VALUES ({number}, '{name}');\n"
+                    "COMMIT;"
+                )
+            except Exception:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+            applied.append((number, name))
+    finally:
+        conn.close()
+    return applied
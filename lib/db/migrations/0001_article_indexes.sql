@@ -0,0 +1,11 @@
+-- lib/db/migrations/0001_article_indexes.sql
+--
+-- The composite indexes lead with each foreign key, so they also serve
+-- plain author_id / magazine_id lookups without a second index per column.
+-- They cover the joins in Author.magazines and Magazine.contributors.
+
+CREATE INDEX IF NOT EXISTS idx_articles_author_magazine ON articles (author_id, magazine_id);
+CREATE INDEX IF NOT EXISTS idx_articles_magazine_author ON articles (magazine_id, author_id);
+
+CREATE INDEX IF NOT EXISTS idx_authors_name ON authors (name);
+CREATE INDEX IF NOT EXISTS idx_magazines_name ON magazines (name);
@@ -0,0 +1,8 @@
+-- lib/db/migrations/0002_article_fk_indexes.sql
+--
+-- Single-column indexes keep rows for one author / magazine in id order,
+-- so keyset pages (WHERE author_id = ? AND id > ? ORDER BY id) are read
+-- straight off the index instead of being sorted in a temp B-tree.
+
+CREATE INDEX IF NOT EXISTS idx_articles_author_id ON articles (author_id);
+CREATE INDEX IF NOT EXISTS idx_articles_magazine_id ON articles (magazine_id);
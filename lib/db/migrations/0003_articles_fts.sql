@@ -0,0 +1,25 @@
+-- lib/db/migrations/0003_articles_fts.sql
+--
+-- External-content FTS5 index over article titles. Triggers keep it in
+-- step with the articles table; 'rebuild' back-fills existing rows.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title,
+    content='articles',
+    content_rowid='id'
+);
+
+CREATE TRIGGER IF NOT EXISTS articles_fts_after_insert AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, title) VALUES (new.id, new.title);
+END;
+
+CREATE TRIGGER IF NOT EXISTS articles_fts_after_delete AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title) VALUES ('delete', old.id, old.title);
+END;
+
+CREATE TRIGGER IF NOT EXISTS articles_fts_after_update AFTER UPDATE OF id, title ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title) VALUES ('delete', old.id, old.title);
+    INSERT INTO articles_fts (rowid, title) VALUES (new.id, new.title);
+END;
+
+INSERT INTO articles_fts (articles_fts) VALUES ('rebuild');
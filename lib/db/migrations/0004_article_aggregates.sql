@@ -0,0 +1,112 @@
+-- lib/db/migrations/0004_article_aggregates.sql
+--
+-- Article counts per author, per magazine and per (author, magazine),
+-- maintained by triggers so leaderboard queries read an index instead of
+-- grouping the whole articles table. Rows are deleted when their count
+-- drops to zero. lib/db/aggregates.py can verify and rebuild them.
+
+CREATE TABLE IF NOT EXISTS author_article_counts (
+    author_id INTEGER PRIMARY KEY,
+    article_count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_author_article_counts_rank
+    ON author_article_counts (article_count DESC, author_id);
+
+CREATE TABLE IF NOT EXISTS magazine_article_counts (
+    magazine_id INTEGER PRIMARY KEY,
+    article_count INTEGER NOT NULL,
+    author_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_magazine_article_counts_authors
+    ON magazine_article_counts (author_count);
+
+CREATE TABLE IF NOT EXISTS author_magazine_counts (
+    author_id INTEGER NOT NULL,
+    magazine_id INTEGER NOT NULL,
+    article_count INTEGER NOT NULL,
+    PRIMARY KEY (author_id, magazine_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_author_magazine_counts_magazine
+    ON author_magazine_counts (magazine_id, article_count);
+
+-- Back-fill before the triggers exist so nothing is counted twice.
+INSERT INTO author_article_counts (author_id, article_count)
+    SELECT author_id, COUNT(*) FROM articles WHERE author_id IS NOT NULL GROUP BY author_id;
+INSERT INTO author_magazine_counts (author_id, magazine_id, article_count)
+    SELECT author_id, magazine_id, COUNT(*) FROM articles
+    WHERE author_id IS NOT NULL AND magazine_id IS NOT NULL
+    GROUP BY author_id, magazine_id;
+INSERT INTO magazine_article_counts (magazine_id, article_count, author_count)
+    SELECT magazine_id, COUNT(*), COUNT(DISTINCT author_id) FROM articles
+    WHERE magazine_id IS NOT NULL GROUP BY magazine_id;
+
+-- A new or vanished (author, magazine) pair changes the magazine's
+-- distinct author count.
+CREATE TRIGGER IF NOT EXISTS author_magazine_counts_after_insert
+AFTER INSERT ON author_magazine_counts BEGIN
+    UPDATE magazine_article_counts SET author_count = author_count + 1
+    WHERE magazine_id = new.magazine_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS author_magazine_counts_after_delete
+AFTER DELETE ON author_magazine_counts BEGIN
+    UPDATE magazine_article_counts SET author_count = author_count - 1
+    WHERE magazine_id = old.magazine_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS article_counts_after_insert AFTER INSERT ON articles BEGIN
+    INSERT INTO author_article_counts (author_id, article_count)
+        SELECT new.author_id, 1 WHERE new.author_id IS NOT NULL
+        ON CONFLICT (author_id) DO UPDATE SET article_count = article_count + 1;
+    INSERT INTO magazine_article_counts (magazine_id, article_count)
+        SELECT new.magazine_id, 1 WHERE new.magazine_id IS NOT NULL
+        ON CONFLICT (magazine_id) DO UPDATE SET article_count = article_count + 1;
+    INSERT INTO author_magazine_counts (author_id, magazine_id, article_count)
+        SELECT new.author_id, new.magazine_id, 1
+        WHERE new.author_id IS NOT NULL AND new.magazine_id IS NOT NULL
+        ON CONFLICT (author_id, magazine_id) DO UPDATE SET article_count = article_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS article_counts_after_delete AFTER DELETE ON articles BEGIN
+    UPDATE author_article_counts SET article_count = article_count - 1
+        WHERE author_id = old.author_id;
+    DELETE FROM author_article_counts
+        WHERE author_id = old.author_id AND article_count <= 0;
+    UPDATE magazine_article_counts SET article_count = article_count - 1
+        WHERE magazine_id = old.magazine_id;
+    UPDATE author_magazine_counts SET article_count = article_count - 1
+        WHERE author_id = old.author_id AND magazine_id = old.magazine_id;
+    DELETE FROM author_magazine_counts
+        WHERE author_id = old.author_id AND magazine_id = old.magazine_id AND article_count <= 0;
+    DELETE FROM magazine_article_counts
+        WHERE magazine_id = old.magazine_id AND article_count <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS article_counts_after_update
+AFTER UPDATE OF author_id, magazine_id ON articles
+WHEN old.author_id IS NOT new.author_id OR old.magazine_id IS NOT new.magazine_id
+BEGIN
+    UPDATE author_article_counts SET article_count = article_count - 1
+        WHERE author_id = old.author_id;
+    DELETE FROM author_article_counts
+        WHERE author_id = old.author_id AND article_count <= 0;
+    UPDATE magazine_article_counts SET article_count = article_count - 1
+        WHERE magazine_id = old.magazine_id;
+    UPDATE author_magazine_counts SET article_count = article_count - 1
+        WHERE author_id = old.author_id AND magazine_id = old.magazine_id;
+    DELETE FROM author_magazine_counts
+        WHERE author_id = old.author_id AND magazine_id = old.magazine_id AND article_count <= 0;
+    DELETE FROM magazine_article_counts
+        WHERE magazine_id = old.magazine_id AND article_count <= 0;
+
+    INSERT INTO author_article_counts (author_id, article_count)
+        SELECT new.author_id, 1 WHERE new.author_id IS NOT NULL
+        ON CONFLICT (author_id) DO UPDATE SET article_count = article_count + 1;
+    INSERT INTO magazine_article_counts (magazine_id, article_count)
+        SELECT new.magazine_id, 1 WHERE new.magazine_id IS NOT NULL
+        ON CONFLICT (magazine_id) DO UPDATE SET article_count = article_count + 1;
+    INSERT INTO author_magazine_counts (author_id, magazine_id, article_count)
+        SELECT new.author_id, new.magazine_id, 1
+        WHERE new.author_id IS NOT NULL AND new.magazine_id IS NOT NULL
+        ON CONFLICT (author_id, magazine_id) DO UPDATE SET article_count = article_count + 1;
+END;
@@ -0,0 +1,8 @@
+-- lib/db/migrations/0005_lookup_indexes.sql
+--
+-- Equality lookups that still scanned their table, found by the query-plan
+-- checks in lib/test/query_plans.py: Article.find_by_title and
+-- Magazine.find_by_category.
+
+CREATE INDEX IF NOT EXISTS idx_articles_title ON articles (title);
+CREATE INDEX IF NOT EXISTS idx_magazines_category ON magazines (category);
@@ -0,0 +1,13 @@
+-- lib/db/migrations/0006_import_checkpoints.sql
+--
+-- Progress of file imports (lib/db/importer.py). The row for a source is
+-- updated in the same transaction as each chunk it describes, so after a
+-- crash byte_offset points exactly past the last committed record.
+
+CREATE TABLE IF NOT EXISTS import_checkpoints (
+    source TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    byte_offset INTEGER NOT NULL,
+    rows INTEGER NOT NULL,
+    updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
@@ -1,43 +1,189 @@
 # lib/db/seed.py
+#
+# Deterministic bulk seeder:
+#
+#     python -m lib.db.seed --authors 100000 --magazines 10000 --articles 10000000 --seed 1
+#
+# Names, categories and titles are drawn from pre-built pools, authors and
+# magazines are picked with a Zipf skew (a few prolific authors and big
+# magazines, a long tail of small ones), and everything is written with
+# executemany in one transaction on the bulk-load profile. Large loads drop
+# the articles indexes and triggers first and rebuild them, the FTS index
+# and the count tables once at the end, which is much cheaper than keeping
+# them up to date row by row.
+
+import argparse
+import itertools
+import random
+import time
+
+from lib.db.aggregates import recompute
+from lib.db.connection import get_connection_cm
+from lib.db.migrate import upgrade
+
+BATCH_SIZE = 50_000
+TITLE_POOL_SIZE = 50_000
+DEFAULT_SKEW = 1.0
+# Below this many new articles (or fewer than are already stored) rows go
+# in with indexes and triggers live; rebuilding them would cost more.
+BULK_MIN_ARTICLES = 100_000
+
+FIRST_NAMES = (
+    "Ada", "Ben", "Chloe", "Dan", "Eve", "Femi", "Grace", "Hugo", "Ines", "Jon",
+    "Kemi", "Liam", "Mara", "Nia", "Omar", "Pia", "Quinn", "Rosa", "Sam", "Tara",
+)
+LAST_NAMES = (
+    "Achieng", "Brown", "Chen", "Diaz", "Evans", "Fischer", "Garcia", "Hassan",
+    "Ito", "Jones", "Kamau", "Lopez", "Miller", "Nguyen", "Otieno", "Patel",
+)
+CATEGORIES = (
+    "Science", "Technology", "Health", "Politics", "Economics", "Sport",
+    "Culture", "Travel", "Food", "Education",
+)
+WORDS = (
+    "quantum", "climate", "market", "health", "future", "energy", "policy",
+    "data", "ocean", "city", "music", "vaccine", "election", "startup",
+    "galaxy", "farming", "privacy", "robot", "language", "history", "trade",
+    "river", "school", "football", "design", "budget", "satellite", "forest",
+    "genome", "bridge", "coffee", "wildlife", "network", "poetry", "housing",
+    "migration", "battery", "festival", "mountain", "software",
+)
+
+
+def title_pool(rng, size=TITLE_POOL_SIZE):
+    return [" ".join(rng.choices(WORDS, k=rng.randint(3, 7))).capitalize() for _ in range(size)]
+
+
+def zipf_weights(count, skew=DEFAULT_SKEW):
+    """Cumulative weights 1/rank**skew for ``count`` items; skew 0 is uniform."""
+    return list(itertools.accumulate(1 / rank ** skew for rank in range(1, count + 1)))
+
+
+def skewed_picker(rng, ids, skew):
+    # Shuffle so the most popular ids are spread out rather than 1, 2, 3...
+    ranked = list(ids)
+    rng.shuffle(ranked)
+    cum_weights = zipf_weights(len(ranked), skew)
+    return lambda k: rng.choices(ranked, cum_weights=cum_weights, k=k)
+
+
+def _articles_schema(conn):
+    """CREATE statements for the indexes and triggers on articles."""
+    rows = conn.execute(
+        "SELECT type, name, sql FROM sqlite_master"
+        " WHERE tbl_name = 'articles' AND type IN ('index', 'trigger') AND sql IS NOT NULL"
+    ).fetchall()
+    return [(row[0], row[1], row[2]) for row in rows]
+
+
+def _ids(conn, table):
+    return [row[0] for row in conn.execute(f"SELECT id FROM {table}")]
+
+
+def seed_db(db_path=None, authors=100, magazines=10, articles=1000, seed=0,
+            skew=DEFAULT_SKEW, batch_size=BATCH_SIZE):
+    """Append generated authors, magazines and articles; returns a summary dict."""
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    upgrade(db_path)
+    with get_connection_cm(db_path, profile="bulk-load") as conn:
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            first_author = conn.execute("SELECT COALESCE(MAX(id), 0) FROM authors").fetchone()[0] + 1
+            first_magazine = conn.execute("SELECT COALESCE(MAX(id), 0) FROM magazines").fetchone()[0] + 1
+            existing = conn.execute("SELECT COALESCE(MAX(id), 0) FROM articles").fetchone()[0]
+            author_ids = range(first_author, first_author + authors)
+            magazine_ids = range(first_magazine, first_magazine + magazines)
+
+            names = [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+            conn.executemany(
+                "INSERT INTO authors (id, name) VALUES (?, ?)",
+                zip(author_ids, rng.choices(names, k=authors)),
+            )
+            conn.executemany(
+                "INSERT INTO magazines (id, name, category) VALUES (?, ?, ?)",
+                ((id, f"The {rng.choice(WORDS).title()} Review {id}", rng.choice(CATEGORIES))
+                 for id in magazine_ids),
+            )
+
+            # New articles go to the new authors and magazines, or to the
+            # stored ones when none are being added.
+            if articles:
+                author_ids = author_ids or _ids(conn, "authors")
+                magazine_ids = magazine_ids or _ids(conn, "magazines")
+                if not author_ids or not magazine_ids:
+                    raise ValueError(
+                        f"cannot seed {articles} articles without "
+                        f"{'authors' if not author_ids else 'magazines'};"
+                        " add some with --authors/--magazines")
+
+            bulk = articles >= max(BULK_MIN_ARTICLES, existing)
+            schema = _articles_schema(conn) if bulk else []
+            for kind, name, _ in schema:
+                conn.execute(f"DROP {kind.upper()} {name}")
+
+            if articles:
+                titles = title_pool(rng)
+                pick_author = skewed_picker(rng, author_ids, skew)
+                pick_magazine = skewed_picker(rng, magazine_ids, skew)
+                for start in range(0, articles, batch_size):
+                    count = min(batch_size, articles - start)
+                    conn.executemany(
+                        "INSERT INTO articles (title, author_id, magazine_id) VALUES (?, ?, ?)",
+                        zip(rng.choices(titles, k=count), pick_author(count), pick_magazine(count)),
+                    )
+
+            if bulk:
+                for kind, _, sql in schema:
+                    if kind == "index":
+                        conn.execute(sql)
+                if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'articles_fts'").fetchone():
+                    conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+                recompute(conn)
+                for kind, _, sql in schema:
+                    if kind == "trigger":
+                        conn.execute(sql)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    elapsed = time.perf_counter() - started
+    return {
+        "authors": authors,
+        "magazines": magazines,
+        "articles": articles,
+        "seconds": round(elapsed, 2),
+        "articles_per_second": round(articles / elapsed) if elapsed else None,
+    }
+
+
+def count(value):
+    # Accept 1e7 as well as 10000000.
+    return int(float(value))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fill the database with generated data.")
+    parser.add_argument("--db", help="database file (default: the application database)")
+    parser.add_argument("--authors", type=count, default=100)
+    parser.add_argument("--magazines", type=count, default=10)
+    parser.add_argument("--articles", type=count, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skew", type=float, default=DEFAULT_SKEW,
+                        help="Zipf exponent for picking authors and magazines; 0 is uniform")
+    parser.add_argument("--batch-size", type=count, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    try:
+        summary = seed_db(args.db, args.authors, args.magazines, args.articles, args.seed,
+                          args.skew, args.batch_size)
+    except ValueError as exc:
+        parser.error(str(exc))
+    print(f"Seeded {summary['authors']} authors, {summary['magazines']} magazines and "
+          f"{summary['articles']} articles in {summary['seconds']}s "
+          f"({summary['articles_per_second']} articles/s).")
 
-from lib.db.connection import get_connection
-
-def seed_db():
-    conn = get_connection("my_database.db") 
-    cursor = conn.cursor()
-    
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS authors (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL
-        )
-    """)
-    
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS magazines (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            category TEXT NOT NULL
-        )
-    """)
-    
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS articles (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            author_id INTEGER,
-            magazine_id INTEGER,
-            FOREIGN KEY(author_id) REFERENCES authors(id),
-            FOREIGN KEY(magazine_id) REFERENCES magazines(id)
-        )
-    """)
-    
-    cursor.execute("INSERT INTO authors (name) VALUES (?)", ("Test Author",))
-    cursor.execute("INSERT INTO magazines (name, category) VALUES (?, ?)", ("Test Magazine", "Test Category"))
-    
-    conn.commit()
-    conn.close()
 
 if __name__ == "__main__":
-    seed_db()
+    main()
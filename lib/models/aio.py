@@ -0,0 +1,152 @@
+# lib/models/aio.py
+#
+# Async facade over the blocking models, e.g.
+#
+#     articles = await AsyncArticle.find_by_author(author_id)
+#     mags = await AsyncAuthor.magazines(author)
+
+import asyncio
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from lib.db.connection import transaction
+from lib.models.article import Article
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+
+MAX_WORKERS = 4
+MAX_PENDING = 64
+
+
+class SQLiteExecutor:
+    """Runs blocking model calls on a few dedicated threads.
+
+    Each call runs start to finish on one worker, which checks its pooled
+    connection out and back in itself. Cancelling the awaiting task drops a
+    call that has not started yet; a call already running is left to finish
+    so its transaction commits or rolls back as a whole. At most
+    ``max_pending`` calls are in flight per event loop; further callers wait
+    in the loop rather than queueing unbounded work on the threads.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, max_pending=MAX_PENDING):
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="sqlite")
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _semaphore(self, loop):
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_pending)
+        return semaphore
+
+    async def run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphore(loop)
+        await semaphore.acquire()
+
+        def release(_):
+            # The slot is freed when the worker is really done, not when the
+            # awaiting task gives up, so cancellations cannot overrun the bound.
+            try:
+                loop.call_soon_threadsafe(semaphore.release)
+            except RuntimeError:
+                pass
+
+        try:
+            future = self._executor.submit(functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            semaphore.release()
+            raise
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    async def run_transaction(self, fn, *args, **kwargs):
+        """Run ``fn(conn, *args, **kwargs)`` in one transaction on a worker.
+
+        Model calls made by ``fn`` join the same transaction.
+        """
+        return await self.run(_in_transaction, fn, *args, **kwargs)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+def _in_transaction(fn, *args, **kwargs):
+    with transaction() as conn:
+        return fn(conn, *args, **kwargs)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = SQLiteExecutor()
+        return _executor
+
+
+def shutdown():
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
+
+
+def _async(cls, name):
+    # Look the method up on every call, so wrappers installed on the model
+    # classes later (instrumentation) are used too.
+    @functools.wraps(getattr(cls, name))
+    async def wrapper(*args, **kwargs):
+        return await get_executor().run(getattr(cls, name), *args, **kwargs)
+    return staticmethod(wrapper)
+
+
+class AsyncArticle:
+    create = _async(Article, "create")
+    create_many = _async(Article, "create_many")
+    all = _async(Article, "all")
+    find_by_author = _async(Article, "find_by_author")
+    find_by_magazine = _async(Article, "find_by_magazine")
+    find_by_title = _async(Article, "find_by_title")
+    page = _async(Article, "page")
+
+
+class AsyncAuthor:
+    create = _async(Author, "create")
+    create_many = _async(Author, "create_many")
+    find_by_id = _async(Author, "find_by_id")
+    find_by_name = _async(Author, "find_by_name")
+    page = _async(Author, "page")
+    prefetch = _async(Author, "prefetch")
+    top_author = _async(Author, "top_author")
+    # Instance methods take the author as their first argument.
+    add_article = _async(Author, "add_article")
+    articles = _async(Author, "articles")
+    magazines = _async(Author, "magazines")
+    topic_areas = _async(Author, "topic_areas")
+    save = _async(Author, "save")
+
+
+class AsyncMagazine:
+    create = _async(Magazine, "create")
+    create_many = _async(Magazine, "create_many")
+    find_by_id = _async(Magazine, "find_by_id")
+    find_by_name = _async(Magazine, "find_by_name")
+    find_by_category = _async(Magazine, "find_by_category")
+    page = _async(Magazine, "page")
+    prefetch = _async(Magazine, "prefetch")
+    with_multiple_authors = _async(Magazine, "with_multiple_authors")
+    article_counts = _async(Magazine, "article_counts")
+    # Instance methods take the magazine as their first argument.
+    articles = _async(Magazine, "articles")
+    contributors = _async(Magazine, "contributors")
+    article_titles = _async(Magazine, "article_titles")
+    contributing_authors = _async(Magazine, "contributing_authors")
+    save = _async(Magazine, "save")
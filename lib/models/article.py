@@ -1,62 +1,183 @@
-from lib.db.connection import get_connection
+from lib.db.connection import get_connection_cm, retry_on_busy
+from lib.models import write_behind
+from lib.models.identity_map import identity_map
+from lib.models.pagination import PAGE_SIZE, fetch_page
+
+CHUNK_SIZE = 1000
+SEARCH_LIMIT = 20
+
+
+def expire_prefetched(rows):
+    """New (title, author_id, magazine_id) rows make the prefetched relations
+    of their cached authors and magazines incomplete."""
+    if identity_map.enabled:
+        from lib.models.author import Author
+        from lib.models.magazine import Magazine
+        identity_map.expire(Author, {row[1] for row in rows})
+        identity_map.expire(Magazine, {row[2] for row in rows})
+
 
 class Article:
+    __slots__ = ("id", "title", "author_id", "magazine_id")
+
     def __init__(self, id=None, title=None, author_id=None, magazine_id=None):
         self.id = id
         self.title = title
         self.author_id = author_id
         self.magazine_id = magazine_id
 
+    @classmethod
+    def from_row(cls, cursor, row):
+        # sqlite3 row_factory: build the instance straight from the row
+        # tuple instead of going through an intermediate sqlite3.Row.
+        article = cls.__new__(cls)
+        article.id, article.title, article.author_id, article.magazine_id = row
+        return article
+
     def __repr__(self):
         return f"<Article id={self.id} title={self.title}>"
 
     @classmethod
+    @retry_on_busy
     def create(cls, title, author_id, magazine_id):
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO articles (title, author_id, magazine_id) VALUES (?, ?, ?)",
-            (title, author_id, magazine_id)
-        )
-        conn.commit()
-        article_id = cursor.lastrowid
-        conn.close()
+        writer = write_behind.current()
+        if writer is not None and writer.accepts():
+            return writer.submit(title, author_id, magazine_id).result()
+        with get_connection_cm() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO articles (title, author_id, magazine_id) VALUES (?, ?, ?)",
+                (title, author_id, magazine_id)
+            )
+            conn.commit()
+            article_id = cursor.lastrowid
+        expire_prefetched([(title, author_id, magazine_id)])
         return cls(article_id, title, author_id, magazine_id)
 
+    @classmethod
+    @retry_on_busy
+    def create_many(cls, rows):
+        rows = [tuple(row) for row in rows]
+        if not rows:
+            return []
+        with get_connection_cm() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "INSERT INTO articles (title, author_id, magazine_id) VALUES (?, ?, ?)",
+                rows
+            )
+            # AUTOINCREMENT ids are handed out consecutively while this
+            # transaction holds the write lock.
+            last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+            conn.commit()
+        expire_prefetched(rows)
+        first_id = last_id - len(rows) + 1
+        return [cls(first_id + i, *row) for i, row in enumerate(rows)]
+
     @classmethod
     def all(cls):
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, title, author_id, magazine_id FROM articles")
-        rows = cursor.fetchall()
-        conn.close()
-        return [cls(*row) for row in rows]
+        with get_connection_cm(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = cls.from_row
+            cursor.execute("SELECT id, title, author_id, magazine_id FROM articles")
+            return cursor.fetchall()
 
     @classmethod
     def find_by_author(cls, author_id):
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, title, author_id, magazine_id FROM articles WHERE author_id = ?", (author_id,))
-        rows = cursor.fetchall()
-        conn.close()
-        return [cls(*row) for row in rows]
+        with get_connection_cm(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = cls.from_row
+            cursor.execute("SELECT id, title, author_id, magazine_id FROM articles WHERE author_id = ?", (author_id,))
+            return cursor.fetchall()
 
     @classmethod
     def find_by_magazine(cls, magazine_id):
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, title, author_id, magazine_id FROM articles WHERE magazine_id = ?", (magazine_id,))
-        rows = cursor.fetchall()
-        conn.close()
-        return [cls(*row) for row in rows]
+        with get_connection_cm(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = cls.from_row
+            cursor.execute("SELECT id, title, author_id, magazine_id FROM articles WHERE magazine_id = ?", (magazine_id,))
+            return cursor.fetchall()
 
     @classmethod
     def find_by_title(cls, title):
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, title, author_id, magazine_id FROM articles WHERE title = ?", (title,))
-        row = cursor.fetchone()
-        conn.close()
-        if row:
-            return cls(*row)
-        return None
+        with get_connection_cm(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = cls.from_row
+            cursor.execute("SELECT id, title, author_id, magazine_id FROM articles WHERE title = ?", (title,))
+            return cursor.fetchone()
+
+    @classmethod
+    def _iter(cls, sql, params, chunk_size, raw):
+        with get_connection_cm(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None if raw else cls.from_row
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield from rows
+
+    @classmethod
+    def iter_all(cls, chunk_size=CHUNK_SIZE, raw=False):
+        """Stream every article in constant memory.
+
+        Rows are fetched ``chunk_size`` at a time from one cursor and the
+        connection is held only while the caller iterates. With ``raw=True``
+        plain (id, title, author_id, magazine_id) tuples are yielded.
+        """
+        return cls._iter("SELECT id, title, author_id, magazine_id FROM articles", (), chunk_size, raw)
+
+    @classmethod
+    def iter_by_author(cls, author_id, chunk_size=CHUNK_SIZE, raw=False):
+        return cls._iter(
+            "SELECT id, title, author_id, magazine_id FROM articles WHERE author_id = ?",
+            (author_id,), chunk_size, raw)
+
+    @classmethod
+    def iter_by_magazine(cls, magazine_id, chunk_size=CHUNK_SIZE, raw=False):
+        return cls._iter(
+            "SELECT id, title, author_id, magazine_id FROM articles WHERE magazine_id = ?",
+            (magazine_id,), chunk_size, raw)
+
+    @classmethod
+    def page(cls, after_id=None, limit=PAGE_SIZE, author_id=None, magazine_id=None, cursor=None):
+        return fetch_page(
+            "articles", "id, title, author_id, magazine_id", cls.from_row,
+            after_id, limit, cursor, author_id=author_id, magazine_id=magazine_id)
+
+    @staticmethod
+    def _match_expression(query):
+        # Treat user input as keywords, not FTS5 syntax: every word must
+        # match, and a trailing * keeps prefix search ("quant*").
+        terms = []
+        for word in query.replace('"', " ").split():
+            prefix = word.endswith("*")
+            word = word.rstrip("*")
+            if word:
+                terms.append(f'"{word}"' + ("*" if prefix else ""))
+        return " ".join(terms)
+
+    @classmethod
+    def search(cls, query, limit=SEARCH_LIMIT, magazine_id=None):
+        """Return articles whose title matches ``query``, best bm25 rank first."""
+        match = cls._match_expression(query)
+        if not match:
+            return []
+        sql = """
+            SELECT a.id, a.title, a.author_id, a.magazine_id
+            FROM articles_fts
+            JOIN articles a ON a.id = articles_fts.rowid
+            WHERE articles_fts MATCH ?
+        """
+        params = [match]
+        if magazine_id is not None:
+            sql += " AND a.magazine_id = ?"
+            params.append(magazine_id)
+        sql += " ORDER BY articles_fts.rank LIMIT ?"
+        params.append(limit)
+        with get_connection_cm(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = cls.from_row
+            cursor.execute(sql, params)
+            return cursor.fetchall()
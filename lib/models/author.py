@@ -1,16 +1,29 @@
-import unittest
-from lib.db.connection import get_connection_cm
+from lib.db.connection import get_connection_cm, retry_on_busy
 from lib.models.article import Article
+from lib.models.identity_map import identity_map
+from lib.models.pagination import PAGE_SIZE, fetch_page
+from lib.models.prefetch import attach, fetch_grouped
 
 class Author:
+    __slots__ = ("id", "name", "_prefetched")
+
     def __init__(self, id=None, name=None):
         self.id = id
         self.name = name
+        self._prefetched = None
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        author = cls.__new__(cls)
+        author.id, author.name = row
+        author._prefetched = None
+        return author
 
     def __repr__(self):
         return f"<Author id={self.id} name={self.name}>"
 
     @classmethod
+    @retry_on_busy
     def create(cls, name):
         with get_connection_cm() as conn:
             cursor = conn.cursor()
@@ -20,36 +33,78 @@ class Author:
         return cls(author_id, name)
 
     @classmethod
-    def find_by_name(cls, name):
+    @retry_on_busy
+    def create_many(cls, rows):
+        rows = [tuple(row) for row in rows]
+        if not rows:
+            return []
         with get_connection_cm() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT id, name FROM authors WHERE name = ?", (name,))
+            cursor.executemany("INSERT INTO authors (name) VALUES (?)", rows)
+            last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+            conn.commit()
+        first_id = last_id - len(rows) + 1
+        return [cls(first_id + i, *row) for i, row in enumerate(rows)]
+
+    @classmethod
+    def find_by_id(cls, author_id):
+        cached = identity_map.get(cls, author_id)
+        if cached is not None:
+            return cached
+        with get_connection_cm(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, name FROM authors WHERE id = ?", (author_id,))
             row = cursor.fetchone()
         if row:
-            return cls(*row)
+            return identity_map.put(cls, row)
         return None
 
+    @classmethod
+    def find_by_name(cls, name):
+        with get_connection_cm(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = cls.from_row
+            cursor.execute("SELECT id, name FROM authors WHERE name = ?", (name,))
+            return cursor.fetchone()
+
+    @classmethod
+    def page(cls, after_id=None, limit=PAGE_SIZE, cursor=None):
+        return fetch_page(
+            "authors", "id, name", lambda cursor, row: identity_map.load(cls, row),
+            after_id, limit, cursor)
+
     def add_article(self, magazine, title):
-        return Article.create(title, self.id, magazine.id)
+        article = Article.create(title, self.id, magazine.id)
+        # Prefetched relations of both sides no longer include the article.
+        self._prefetched = None
+        if isinstance(getattr(magazine, "_prefetched", None), dict):
+            magazine._prefetched = None
+        return article
 
     def articles(self):
+        if self._prefetched and "articles" in self._prefetched:
+            return self._prefetched["articles"]
         return Article.find_by_author(self.id)
 
     def magazines(self):
         from lib.models.magazine import Magazine
-        with get_connection_cm() as conn:
+        if self._prefetched and "magazines" in self._prefetched:
+            return self._prefetched["magazines"]
+        with get_connection_cm(readonly=True) as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT DISTINCT m.id, m.name, m.category
-                FROM magazines m
-                JOIN articles a ON m.id = a.magazine_id
-                WHERE a.author_id = ?
+                SELECT m.id, m.name, m.category
+                FROM author_magazine_counts c
+                JOIN magazines m ON m.id = c.magazine_id
+                WHERE c.author_id = ?
             """, (self.id,))
             rows = cursor.fetchall()
-        return [Magazine(*row) for row in rows]
+        return [identity_map.load(Magazine, row) for row in rows]
 
     def topic_areas(self):
-        with get_connection_cm() as conn:
+        if self._prefetched and "topic_areas" in self._prefetched:
+            return self._prefetched["topic_areas"]
+        with get_connection_cm(readonly=True) as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT DISTINCT m.category
@@ -60,6 +115,42 @@ class Author:
             rows = cursor.fetchall()
         return [row[0] for row in rows]
 
+    @classmethod
+    def prefetch(cls, authors, *relations):
+        """Load ``relations`` for every author with one query per relation.
+
+        Supported relations are "articles", "magazines" and "topic_areas";
+        afterwards the matching methods answer without touching the database.
+        """
+        from lib.models.magazine import Magazine
+        authors = list(authors)
+        ids = [author.id for author in authors]
+        for relation in relations:
+            if relation == "articles":
+                grouped = fetch_grouped(
+                    "SELECT author_id, id, title, author_id, magazine_id FROM articles"
+                    " WHERE author_id IN ({ids})",
+                    ids, lambda row: Article(*row))
+            elif relation == "magazines":
+                grouped = fetch_grouped("""
+                    SELECT c.author_id, m.id, m.name, m.category
+                    FROM author_magazine_counts c
+                    JOIN magazines m ON m.id = c.magazine_id
+                    WHERE c.author_id IN ({ids})
+                """, ids, lambda row: identity_map.load(Magazine, row))
+            elif relation == "topic_areas":
+                grouped = fetch_grouped("""
+                    SELECT DISTINCT a.author_id, m.category
+                    FROM magazines m
+                    JOIN articles a ON m.id = a.magazine_id
+                    WHERE a.author_id IN ({ids})
+                """, ids, lambda row: row[0])
+            else:
+                raise ValueError(f"Author has no prefetchable relation {relation!r}")
+            attach(authors, relation, grouped)
+        return authors
+
+    @retry_on_busy
     def save(self):
         with get_connection_cm() as conn:
             cursor = conn.cursor()
@@ -69,67 +160,21 @@ class Author:
             else:
                 cursor.execute("UPDATE authors SET name = ? WHERE id = ?", (self.name, self.id))
             conn.commit()
+        self._prefetched = None
+        identity_map.invalidate(Author, self.id)
 
     @classmethod
     def top_author(cls):
-        with get_connection_cm() as conn:
+        with get_connection_cm(readonly=True) as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT a.id, a.name, COUNT(ar.id) as article_count
-                FROM authors a
-                JOIN articles ar ON a.id = ar.author_id
-                GROUP BY a.id
-                ORDER BY article_count DESC
+                SELECT a.id, a.name
+                FROM author_article_counts c
+                JOIN authors a ON a.id = c.author_id
+                ORDER BY c.article_count DESC, c.author_id
                 LIMIT 1
             """)
             row = cursor.fetchone()
         if row:
             return cls(row[0], row[1])
         return None
-
-# --- Unit tests (for development only, best in a separate test file) ---
-
-class TestAuthor(unittest.TestCase):
-    def setUp(self):
-        from lib.models.magazine import Magazine
-        with get_connection_cm() as conn:
-            cursor = conn.cursor()
-            cursor.executescript("""
-                DELETE FROM articles;
-                DELETE FROM authors;
-                DELETE FROM magazines;
-            """)
-            conn.commit()
-
-        self.author = Author.create("Jane Doe")
-        self.mag1 = Magazine.create("Nature Weekly", "Science")
-        self.mag2 = Magazine.create("Tech Digest", "Technology")
-
-    def test_create_author(self):
-        self.assertIsInstance(self.author, Author)
-        self.assertEqual(self.author.name, "Jane Doe")
-
-    def test_add_article(self):
-        article = self.author.add_article(self.mag1, "Climate Change")
-        from lib.models.article import Article
-        self.assertIsInstance(article, Article)
-        self.assertEqual(article.title, "Climate Change")
-
-    def test_articles_method(self):
-        self.author.add_article(self.mag1, "A1")
-        self.author.add_article(self.mag2, "A2")
-        self.assertEqual(len(self.author.articles()), 2)
-
-    def test_magazines_method(self):
-        self.author.add_article(self.mag1, "Sci A")
-        self.author.add_article(self.mag2, "Tech B")
-        magazine_names = [mag.name for mag in self.author.magazines()]
-        self.assertIn("Nature Weekly", magazine_names)
-        self.assertIn("Tech Digest", magazine_names)
-
-    def test_topic_areas(self):
-        self.author.add_article(self.mag1, "X")
-        self.author.add_article(self.mag2, "Y")
-        categories = self.author.topic_areas()
-        self.assertIn("Science", categories)
-        self.assertIn("Technology", categories)
@@ -1,34 +1,33 @@
-from faker import Faker
 from lib.models.author import Author
 from lib.models.magazine import Magazine
 from lib.models.article import Article
-from lib.db.connection import get_connection
-import random
+from lib.db.connection import format_instrumentation_stats, get_connection_cm, instrumentation_from_env
+from lib.models.identity_map import identity_map
 
-fake = Faker()
+PAGE_SIZE = 20
 
 def print_header(title):
     print(f"\n{'=' * 50}\n{title}\n{'=' * 50}")
 
+def print_pages(fetch, format_item):
+    cursor = None
+    while True:
+        page = fetch(cursor=cursor, limit=PAGE_SIZE)
+        for item in page.items:
+            print(format_item(item))
+        if page.next_cursor is None:
+            return
+        if input("-- Enter for more, q to stop -- ").strip().lower() == "q":
+            return
+        cursor = page.next_cursor
+
 def list_authors():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, name FROM authors")
-    rows = cursor.fetchall()
-    conn.close()
     print_header("All Authors")
-    for row in rows:
-        print(f"{row[0]}: {row[1]}")
+    print_pages(Author.page, lambda author: f"{author.id}: {author.name}")
 
 def list_magazines():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, name, category FROM magazines")
-    rows = cursor.fetchall()
-    conn.close()
     print_header("All Magazines")
-    for row in rows:
-        print(f"{row[0]}: {row[1]} (Category: {row[2]})")
+    print_pages(Magazine.page, lambda mag: f"{mag.id}: {mag.name} (Category: {mag.category})")
 
 def create_author():
     name = input("Enter author name: ")
@@ -59,16 +58,11 @@ def add_article():
     except ValueError:
         print("Invalid magazine ID.")
         return
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, name, category FROM magazines WHERE id = ?", (magazine_id,))
-    row = cursor.fetchone()
-    conn.close()
-    if not row:
+    magazine = Magazine.find_by_id(magazine_id)
+    if not magazine:
         print("Magazine not found.")
         return
 
-    magazine = Magazine(*row)
     title = input("Enter article title: ")
     article = author.add_article(magazine, title)
     print(f"Article '{title}' added for author '{author.name}' in magazine '{magazine.name}'.")
@@ -148,10 +142,10 @@ def list_magazines_by_author():
 
 def list_articles_by_author_name():
     name = input("Enter author name: ")
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM authors WHERE name = ?", (name,))
-    row = cursor.fetchone()
+    with get_connection_cm(readonly=True) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM authors WHERE name = ?", (name,))
+        row = cursor.fetchone()
     if row:
         author = Author.find_by_id(row[0])
         articles = author.articles()
@@ -162,41 +156,45 @@ def list_articles_by_author_name():
         print("Author not found.")
 
 def most_prolific_author():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT a.name, COUNT(ar.id) as article_count
-        FROM authors a
-        JOIN articles ar ON a.id = ar.author_id
-        GROUP BY a.id
-        ORDER BY article_count DESC
-        LIMIT 1
-    """)
-    row = cursor.fetchone()
-    conn.close()
+    with get_connection_cm(readonly=True) as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT a.name, c.article_count
+            FROM author_article_counts c
+            JOIN authors a ON a.id = c.author_id
+            ORDER BY c.article_count DESC, c.author_id
+            LIMIT 1
+        """)
+        row = cursor.fetchone()
     if row:
         print_header("Most Prolific Author")
         print(f"{row[0]} with {row[1]} articles")
     else:
         print("No data available.")
 
-def seed_data():
-    num_authors = 10
-    num_magazines = 5
-    articles_per_author = 3
+def search_articles():
+    query = input("Enter search keywords: ")
+    articles = Article.search(query)
+    print_header(f"Articles matching '{query}'")
+    if not articles:
+        print("No matching articles.")
+    for article in articles:
+        print(f"{article.id}: {article.title} (Magazine ID: {article.magazine_id})")
 
-    authors = [Author.create(fake.name()) for _ in range(num_authors)]
-    magazines = [Magazine.create(fake.company(), fake.bs()) for _ in range(num_magazines)]
+def seed_data():
+    # The seeder pulls in the migration and aggregate modules; most runs never seed.
+    from lib.db.seed import seed_db
 
-    for author in authors:
-        for _ in range(articles_per_author):
-            magazine = random.choice(magazines)
-            title = fake.sentence(nb_words=6)
-            Article.create(title, author.id, magazine.id)
+    summary = seed_db(authors=10, magazines=5, articles=30, seed=None)
+    print(f"✅ Seeded {summary['authors']} authors, {summary['magazines']} magazines, and {summary['articles']} articles.")
 
-    print(f"✅ Seeded {num_authors} authors, {num_magazines} magazines, and {num_authors * articles_per_author} articles.")
+def show_performance_stats():
+    print_header("Performance Stats")
+    print(format_instrumentation_stats())
 
 def menu():
+    identity_map.enable()
+    instrumentation_from_env()
     while True:
         print_header("Magazine Publishing CLI")
         print("1. List all authors")
@@ -212,6 +210,8 @@ def menu():
         print("11. Show most prolific author")
         print("12. Seed fake data")
         print("13. Exit")
+        print("14. Search articles")
+        print("15. Show performance stats")
         choice = input("Select an option: ")
 
         if choice == "1":
@@ -241,6 +241,10 @@ def menu():
         elif choice == "13":
             print("Goodbye!")
             break
+        elif choice == "14":
+            search_articles()
+        elif choice == "15":
+            show_performance_stats()
         else:
             print("Invalid option. Try again.")
 
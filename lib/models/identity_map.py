@@ -0,0 +1,121 @@
+# lib/models/identity_map.py
+
+import os
+import threading
+from collections import OrderedDict
+
+IDENTITY_MAP_ENV = "ARTICLES_IDENTITY_MAP"
+DEFAULT_MAXSIZE = 1024
+
+
+class IdentityMap:
+    """Size-bounded LRU of model instances keyed by (class, id).
+
+    Disabled by default. While disabled every method is a pass-through, so
+    the models only pay for an attribute check. Relations prefetched onto a
+    cached instance stay with it until a write expires them, so every
+    caller that gets the shared instance benefits from the prefetch.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self.enabled = False
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def enable(self, maxsize=None):
+        if maxsize is not None:
+            self.maxsize = maxsize
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+        self.clear()
+
+    def get(self, cls, id):
+        if not self.enabled:
+            return None
+        key = (cls, id)
+        with self._lock:
+            obj = self._entries.get(key)
+            if obj is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return obj
+
+    def load(self, cls, row):
+        """Return the cached instance for ``row`` or cache a new one."""
+        if not self.enabled:
+            return cls(*row)
+        key = (cls, row[0])
+        with self._lock:
+            obj = self._entries.get(key)
+            if obj is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return obj
+            self.misses += 1
+            return self._add(key, cls, row)
+
+    def put(self, cls, row):
+        """Cache ``row`` after a get() miss, which was already counted."""
+        if not self.enabled:
+            return cls(*row)
+        key = (cls, row[0])
+        with self._lock:
+            obj = self._entries.get(key)
+            if obj is not None:
+                self._entries.move_to_end(key)
+                return obj
+            return self._add(key, cls, row)
+
+    def _add(self, key, cls, row):
+        obj = self._entries[key] = cls(*row)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return obj
+
+    def invalidate(self, cls, id):
+        with self._lock:
+            self._entries.pop((cls, id), None)
+
+    def expire(self, cls, ids):
+        """Drop the prefetched relations of cached ``cls`` instances in ``ids``."""
+        with self._lock:
+            for id in ids:
+                obj = self._entries.get((cls, id))
+                if obj is not None:
+                    obj._prefetched = None
+
+    def evict_all(self):
+        with self._lock:
+            self._entries.clear()
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def clear(self):
+        self.evict_all()
+        self.reset_stats()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+identity_map = IdentityMap()
+
+if os.environ.get(IDENTITY_MAP_ENV):
+    identity_map.enable(int(os.environ[IDENTITY_MAP_ENV]))
@@ -1,65 +1,30 @@
-from lib.db.connection import get_connection, get_connection_cm
-
-class Article:
-    def __init__(self, id, title, author_id, magazine_id):
-        self.id = id
-        self.title = title
-        self.author_id = author_id
-        self.magazine_id = magazine_id
-
-    def __repr__(self):
-        return f"<Article id={self.id} title={self.title}>"
-
-    @classmethod
-    def create(cls, title, author_id, magazine_id):
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO articles (title, author_id, magazine_id) VALUES (?, ?, ?)",
-            (title, author_id, magazine_id)
-        )
-        conn.commit()
-        article_id = cursor.lastrowid
-        conn.close()
-        return cls(article_id, title, author_id, magazine_id)
-
-    @classmethod
-    def all(cls):
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, title, author_id, magazine_id FROM articles")
-        rows = cursor.fetchall()
-        conn.close()
-        return [cls(*row) for row in rows]
-
-    @classmethod
-    def find_by_author(cls, author_id):
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, title, author_id, magazine_id FROM articles WHERE author_id = ?", (author_id,))
-        rows = cursor.fetchall()
-        conn.close()
-        return [cls(*row) for row in rows]
-
-    @classmethod
-    def find_by_magazine(cls, magazine_id):
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, title, author_id, magazine_id FROM articles WHERE magazine_id = ?", (magazine_id,))
-        rows = cursor.fetchall()
-        conn.close()
-        return [cls(*row) for row in rows]
+from lib.db.connection import get_connection_cm, retry_on_busy
+from lib.models.article import Article
+from lib.models.identity_map import identity_map
+from lib.models.pagination import PAGE_SIZE, fetch_page
+from lib.models.prefetch import attach, fetch_grouped
 
 class Magazine:
+    __slots__ = ("id", "name", "category", "_prefetched")
+
     def __init__(self, id=None, name=None, category=None):
         self.id = id
         self.name = name
         self.category = category
+        self._prefetched = None
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        magazine = cls.__new__(cls)
+        magazine.id, magazine.name, magazine.category = row
+        magazine._prefetched = None
+        return magazine
 
     def __repr__(self):
         return f"<Magazine id={self.id} name={self.name} category={self.category}>"
 
     @classmethod
+    @retry_on_busy
     def create(cls, name, category):
         with get_connection_cm() as conn:
             cursor = conn.cursor()
@@ -68,6 +33,21 @@ class Magazine:
             magazine_id = cursor.lastrowid
         return cls(magazine_id, name, category)
 
+    @classmethod
+    @retry_on_busy
+    def create_many(cls, rows):
+        rows = [tuple(row) for row in rows]
+        if not rows:
+            return []
+        with get_connection_cm() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("INSERT INTO magazines (name, category) VALUES (?, ?)", rows)
+            last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+            conn.commit()
+        first_id = last_id - len(rows) + 1
+        return [cls(first_id + i, *row) for i, row in enumerate(rows)]
+
+    @retry_on_busy
     def save(self):
         with get_connection_cm() as conn:
             cursor = conn.cursor()
@@ -77,42 +57,68 @@ class Magazine:
             else:
                 cursor.execute("UPDATE magazines SET name = ?, category = ? WHERE id = ?", (self.name, self.category, self.id))
             conn.commit()
+        self._prefetched = None
+        identity_map.invalidate(Magazine, self.id)
 
     @classmethod
-    def find_by_category(cls, category):
-        with get_connection_cm() as conn:
+    def find_by_id(cls, magazine_id):
+        cached = identity_map.get(cls, magazine_id)
+        if cached is not None:
+            return cached
+        with get_connection_cm(readonly=True) as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT id, name, category FROM magazines WHERE category = ?", (category,))
+            cursor.execute("SELECT id, name, category FROM magazines WHERE id = ?", (magazine_id,))
             row = cursor.fetchone()
         if row:
-            return cls(*row)
+            return identity_map.put(cls, row)
         return None
 
+    @classmethod
+    def page(cls, after_id=None, limit=PAGE_SIZE, category=None, cursor=None):
+        return fetch_page(
+            "magazines", "id, name, category", lambda cursor, row: identity_map.load(cls, row),
+            after_id, limit, cursor, category=category)
+
+    @classmethod
+    def find_by_category(cls, category):
+        with get_connection_cm(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = cls.from_row
+            cursor.execute("SELECT id, name, category FROM magazines WHERE category = ?", (category,))
+            return cursor.fetchone()
+
     @classmethod
     def find_by_name(cls, name):
-        with get_connection_cm() as conn:
+        with get_connection_cm(readonly=True) as conn:
             cursor = conn.cursor()
+            cursor.row_factory = cls.from_row
             cursor.execute("SELECT id, name, category FROM magazines WHERE name = ?", (name,))
-            row = cursor.fetchone()
-        if row:
-            return cls(*row)
-        return None
+            return cursor.fetchone()
+
+    def articles(self):
+        if self._prefetched and "articles" in self._prefetched:
+            return self._prefetched["articles"]
+        return Article.find_by_magazine(self.id)
 
     def contributors(self):
         from lib.models.author import Author
-        with get_connection_cm() as conn:
+        if self._prefetched and "contributors" in self._prefetched:
+            return self._prefetched["contributors"]
+        with get_connection_cm(readonly=True) as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT DISTINCT a.id, a.name
-                FROM authors a
-                JOIN articles ar ON a.id = ar.author_id
-                WHERE ar.magazine_id = ?
+                SELECT a.id, a.name
+                FROM author_magazine_counts c
+                JOIN authors a ON a.id = c.author_id
+                WHERE c.magazine_id = ?
             """, (self.id,))
             rows = cursor.fetchall()
-        return [Author(row[0], row[1]) for row in rows]
+        return [identity_map.load(Author, row) for row in rows]
 
     def article_titles(self):
-        with get_connection_cm() as conn:
+        if self._prefetched and "article_titles" in self._prefetched:
+            return self._prefetched["article_titles"]
+        with get_connection_cm(readonly=True) as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT title FROM articles WHERE magazine_id = ?", (self.id,))
             rows = cursor.fetchall()
@@ -120,42 +126,79 @@ class Magazine:
 
     def contributing_authors(self):
         from lib.models.author import Author
-        with get_connection_cm() as conn:
+        if self._prefetched and "contributing_authors" in self._prefetched:
+            return self._prefetched["contributing_authors"]
+        with get_connection_cm(readonly=True) as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT a.id, a.name
-                FROM authors a
-                JOIN articles ar ON a.id = ar.author_id
-                WHERE ar.magazine_id = ?
-                GROUP BY a.id
-                HAVING COUNT(ar.id) > 2
+                FROM author_magazine_counts c
+                JOIN authors a ON a.id = c.author_id
+                WHERE c.magazine_id = ? AND c.article_count > 2
             """, (self.id,))
             rows = cursor.fetchall()
-        return [Author(row[0], row[1]) for row in rows]
+        return [identity_map.load(Author, row) for row in rows]
+
+    @classmethod
+    def prefetch(cls, magazines, *relations):
+        """Load ``relations`` for every magazine with one query per relation.
+
+        Supported relations are "articles", "article_titles", "contributors"
+        and "contributing_authors".
+        """
+        from lib.models.author import Author
+        magazines = list(magazines)
+        ids = [magazine.id for magazine in magazines]
+        for relation in relations:
+            if relation == "articles":
+                grouped = fetch_grouped(
+                    "SELECT magazine_id, id, title, author_id, magazine_id FROM articles"
+                    " WHERE magazine_id IN ({ids})",
+                    ids, lambda row: Article(*row))
+            elif relation == "article_titles":
+                grouped = fetch_grouped(
+                    "SELECT magazine_id, title FROM articles WHERE magazine_id IN ({ids})",
+                    ids, lambda row: row[0])
+            elif relation == "contributors":
+                grouped = fetch_grouped("""
+                    SELECT c.magazine_id, a.id, a.name
+                    FROM author_magazine_counts c
+                    JOIN authors a ON a.id = c.author_id
+                    WHERE c.magazine_id IN ({ids})
+                """, ids, lambda row: identity_map.load(Author, row))
+            elif relation == "contributing_authors":
+                grouped = fetch_grouped("""
+                    SELECT c.magazine_id, a.id, a.name
+                    FROM author_magazine_counts c
+                    JOIN authors a ON a.id = c.author_id
+                    WHERE c.magazine_id IN ({ids}) AND c.article_count > 2
+                """, ids, lambda row: identity_map.load(Author, row))
+            else:
+                raise ValueError(f"Magazine has no prefetchable relation {relation!r}")
+            attach(magazines, relation, grouped)
+        return magazines
 
     @classmethod
     def with_multiple_authors(cls):
-        with get_connection_cm() as conn:
+        with get_connection_cm(readonly=True) as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT m.id, m.name, m.category
-                FROM magazines m
-                JOIN articles a ON m.id = a.magazine_id
-                GROUP BY m.id
-                HAVING COUNT(DISTINCT a.author_id) > 1
+                FROM magazine_article_counts c
+                JOIN magazines m ON m.id = c.magazine_id
+                WHERE c.author_count > 1
             """)
             rows = cursor.fetchall()
         return [cls(*row) for row in rows]
 
     @classmethod
     def article_counts(cls):
-        with get_connection_cm() as conn:
+        with get_connection_cm(readonly=True) as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT m.id, m.name, m.category, COUNT(a.id) as article_count
+                SELECT m.id, m.name, m.category, COALESCE(c.article_count, 0) as article_count
                 FROM magazines m
-                LEFT JOIN articles a ON m.id = a.magazine_id
-                GROUP BY m.id
+                LEFT JOIN magazine_article_counts c ON c.magazine_id = m.id
             """)
             rows = cursor.fetchall()
         return [{"id": row[0], "name": row[1], "category": row[2], "article_count": row[3]} for row in rows]
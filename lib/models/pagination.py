@@ -0,0 +1,57 @@
+# lib/models/pagination.py
+
+from collections import namedtuple
+
+from lib.db.connection import get_connection_cm
+
+PAGE_SIZE = 50
+
+Page = namedtuple("Page", ["items", "next_cursor"])
+
+
+# json and base64 are imported on use; most CLI runs never page.
+
+def encode_cursor(last_id):
+    import base64
+    import json
+
+    payload = json.dumps({"after": last_id}).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    import base64
+    import json
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded))["after"])
+    except (ValueError, KeyError, TypeError) as exc:
+        raise ValueError(f"invalid page cursor {cursor!r}") from exc
+
+
+def fetch_page(table, columns, row_factory, after_id=None, limit=PAGE_SIZE, cursor=None, **filters):
+    """Return one keyset page of ``table`` ordered by id.
+
+    Each page seeks with ``WHERE id > ?`` rather than OFFSET, so its cost
+    does not depend on how deep into the table it is. ``next_cursor`` is
+    None on the last page. Filters whose value is None are ignored.
+    """
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    if cursor is not None:
+        after_id = decode_cursor(cursor)
+    where = ["id > ?"]
+    params = [after_id or 0]
+    for column, value in filters.items():
+        if value is not None:
+            where.append(f"{column} = ?")
+            params.append(value)
+    params.append(limit + 1)
+    sql = f"SELECT {columns} FROM {table} WHERE {' AND '.join(where)} ORDER BY id LIMIT ?"
+    with get_connection_cm(readonly=True) as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = row_factory
+        items = cursor.execute(sql, params).fetchall()
+    next_cursor = encode_cursor(items[limit - 1].id) if len(items) > limit else None
+    return Page(items[:limit], next_cursor)
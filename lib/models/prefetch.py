@@ -0,0 +1,30 @@
+# lib/models/prefetch.py
+
+from lib.db.connection import get_connection_cm
+
+# Stay well below SQLite's bound-parameter limit for the IN (...) list.
+BATCH_SIZE = 500
+
+
+def fetch_grouped(sql, ids, build):
+    """Run ``sql`` for every id in ``ids`` using as few queries as possible.
+
+    ``sql`` must select the owning id as its first column and contain an
+    ``{ids}`` placeholder for the IN list. Returns {owner_id: [build(rest)]}.
+    """
+    ids = list(dict.fromkeys(ids))
+    grouped = {}
+    with get_connection_cm(readonly=True) as conn:
+        for start in range(0, len(ids), BATCH_SIZE):
+            batch = ids[start:start + BATCH_SIZE]
+            cursor = conn.execute(sql.format(ids=", ".join("?" * len(batch))), batch)
+            for row in cursor:
+                grouped.setdefault(row[0], []).append(build(tuple(row)[1:]))
+    return grouped
+
+
+def attach(objects, relation, grouped):
+    for obj in objects:
+        if obj._prefetched is None:
+            obj._prefetched = {}
+        obj._prefetched[relation] = grouped.get(obj.id, [])
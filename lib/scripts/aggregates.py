@@ -0,0 +1,28 @@
+# Usage: python -m lib.scripts.aggregates {verify,rebuild} [--db PATH]
+
+import argparse
+import sys
+
+from lib.db.aggregates import rebuild, verify
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check or rebuild the article count tables.")
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    parser.add_argument("--db", help="database file (default: the application database)")
+    args = parser.parse_args(argv)
+
+    if args.command == "rebuild":
+        rebuild(args.db)
+        print("Aggregates rebuilt.")
+
+    drift = verify(args.db)
+    for table, key, stored, expected in drift:
+        print(f"{table} {key}: stored {stored}, expected {expected}")
+    if drift:
+        print(f"{len(drift)} aggregate rows have drifted; run 'rebuild' to fix them.")
+        return 1
+    print("Aggregates match the articles table.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+# Usage: python -m lib.scripts.batch [--db PATH] [--format jsonl|json|csv] COMMAND ...
+#        python cli.py COMMAND ...   (same commands; no arguments starts the menu)
+#
+#   authors list
+#   authors add --name NAME | --from FILE
+#   magazines list [--category CATEGORY]
+#   magazines add --name NAME --category CATEGORY | --from FILE
+#   articles list [--author-id ID | --magazine-id ID]
+#   articles add --title TITLE --author-id ID --magazine-id ID | --from FILE
+#   articles search QUERY [--limit N]
+#   stats top-authors [-k N]
+#   stats magazines
+#
+# --from reads CSV (with a header row) or JSONL; "-" is stdin. Each run uses
+# one connection and one transaction, and results are written as they are
+# read rather than collected first.
+
+import argparse
+import csv
+import json
+import sqlite3
+import sys
+from contextlib import contextmanager, nullcontext
+
+from lib.db.connection import transaction, using_database
+
+FORMATS = ("jsonl", "json", "csv")
+INPUT_FORMATS = ("csv", "jsonl")
+
+
+class RecordWriter:
+    """Writes records (tuples in ``fields`` order) to ``out`` one at a time."""
+
+    def __init__(self, out, fields, fmt):
+        self.out = out
+        self.fields = fields
+        self.fmt = fmt
+        self.count = 0
+        if fmt == "csv":
+            self._csv = csv.writer(out)
+            self._csv.writerow(fields)
+        elif fmt == "json":
+            out.write("[")
+
+    def write(self, record):
+        if self.fmt == "csv":
+            self._csv.writerow(record)
+        else:
+            text = json.dumps(dict(zip(self.fields, record)))
+            if self.fmt == "json":
+                text = ("," if self.count else "") + "\n  " + text
+            else:
+                text += "\n"
+            self.out.write(text)
+        self.count += 1
+
+    def close(self):
+        if self.fmt == "json":
+            self.out.write("\n]\n" if self.count else "]\n")
+        self.out.flush()
+
+
+def write_records(records, fields, fmt, out=None):
+    writer = RecordWriter(out or sys.stdout, fields, fmt)
+    for record in records:
+        writer.write(record)
+    writer.close()
+    return writer.count
+
+
+def read_records(path, fields, input_format=None):
+    """Yield ``fields`` tuples from a CSV or JSONL file, streaming."""
+    if input_format is None:
+        input_format = "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+    f = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    try:
+        if input_format == "csv":
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for number, row in enumerate(rows, 1):
+            yield tuple(_convert(path, number, field, row.get(field)) for field in fields)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def _convert(path, number, field, value):
+    try:
+        if field.endswith("_id"):
+            return int(value)
+        if value is None or value == "":
+            raise ValueError(field)
+        return value
+    except (TypeError, ValueError):
+        raise ValueError(f"{path}: record {number}: bad or missing {field!r}") from None
+
+
+def _records_arg(args, fields):
+    if args.source:
+        return read_records(args.source, fields, args.input_format)
+    values = tuple(getattr(args, field) for field in fields)
+    if any(value is None for value in values):
+        raise ValueError("give --from FILE or all of " + ", ".join("--" + f.replace("_", "-") for f in fields))
+    return [values]
+
+
+@contextmanager
+def session(db_path=None, write=True):
+    """Hold one pooled connection and one transaction for the whole run.
+
+    Model calls made inside share the held connection; reads see a single
+    snapshot and the run's writes commit (or roll back) once. Read-only
+    runs (``write=False``) do not take the write lock. With ``db_path``
+    the models use that database for the run and the previous one after.
+    """
+    with using_database(db_path) if db_path else nullcontext(), \
+            transaction(immediate=write) as conn:
+        yield conn
+
+
+# --- Commands ---------------------------------------------------------------
+#
+# Each returns (fields, records); records may be a generator.
+
+def authors_list(args, conn):
+    from lib.models.author import Author
+    return ("id", "name"), ((a.id, a.name) for a in _paged(Author.page))
+
+
+def authors_add(args, conn):
+    from lib.models.author import Author
+    authors = Author.create_many(_records_arg(args, ("name",)))
+    return ("id", "name"), ((a.id, a.name) for a in authors)
+
+
+def magazines_list(args, conn):
+    from lib.models.magazine import Magazine
+    magazines = _paged(Magazine.page, category=args.category)
+    return ("id", "name", "category"), ((m.id, m.name, m.category) for m in magazines)
+
+
+def magazines_add(args, conn):
+    from lib.models.magazine import Magazine
+    magazines = Magazine.create_many(_records_arg(args, ("name", "category")))
+    return ("id", "name", "category"), ((m.id, m.name, m.category) for m in magazines)
+
+
+ARTICLE_FIELDS = ("id", "title", "author_id", "magazine_id")
+
+
+def articles_list(args, conn):
+    from lib.models.article import Article
+    if args.author_id is not None:
+        rows = Article.iter_by_author(args.author_id, raw=True)
+    elif args.magazine_id is not None:
+        rows = Article.iter_by_magazine(args.magazine_id, raw=True)
+    else:
+        rows = Article.iter_all(raw=True)
+    return ARTICLE_FIELDS, rows
+
+
+def articles_add(args, conn):
+    from lib.models.article import Article
+    articles = Article.create_many(_records_arg(args, ("title", "author_id", "magazine_id")))
+    return ARTICLE_FIELDS, ((a.id, a.title, a.author_id, a.magazine_id) for a in articles)
+
+
+def articles_search(args, conn):
+    from lib.models.article import Article
+    articles = Article.search(args.query, limit=args.limit)
+    return ARTICLE_FIELDS, ((a.id, a.title, a.author_id, a.magazine_id) for a in articles)
+
+
+def stats_top_authors(args, conn):
+    rows = conn.execute("""
+        SELECT a.id, a.name, c.article_count
+        FROM author_article_counts c
+        JOIN authors a ON a.id = c.author_id
+        ORDER BY c.article_count DESC, c.author_id
+        LIMIT ?
+    """, (args.k,))
+    return ("id", "name", "article_count"), (tuple(row) for row in rows)
+
+
+def stats_magazines(args, conn):
+    rows = conn.execute("""
+        SELECT m.id, m.name, COALESCE(c.article_count, 0), COALESCE(c.author_count, 0)
+        FROM magazines m
+        LEFT JOIN magazine_article_counts c ON c.magazine_id = m.id
+        ORDER BY m.id
+    """)
+    return ("id", "name", "article_count", "author_count"), (tuple(row) for row in rows)
+
+
+def _paged(page, **filters):
+    after_id = None
+    while True:
+        result = page(after_id=after_id, limit=500, **filters)
+        yield from result.items
+        if result.next_cursor is None:
+            return
+        after_id = result.items[-1].id
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Scriptable access to authors, magazines and articles.")
+    parser.add_argument("--db", help="database file (default: the application database)")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl", help="output format (default: %(default)s)")
+    groups = parser.add_subparsers(dest="group", required=True)
+
+    def command(group, name, handler, help):
+        sub = group.add_parser(name, help=help)
+        sub.set_defaults(handler=handler)
+        return sub
+
+    def source(sub):
+        sub.add_argument("--from", dest="source", metavar="FILE", help="CSV or JSONL file to read, - for stdin")
+        sub.add_argument("--input-format", choices=INPUT_FORMATS, help="default: from the file extension, else csv")
+
+    authors = groups.add_parser("authors").add_subparsers(dest="command", required=True)
+    command(authors, "list", authors_list, "list every author")
+    sub = command(authors, "add", authors_add, "create authors")
+    sub.add_argument("--name")
+    source(sub)
+
+    magazines = groups.add_parser("magazines").add_subparsers(dest="command", required=True)
+    sub = command(magazines, "list", magazines_list, "list magazines")
+    sub.add_argument("--category")
+    sub = command(magazines, "add", magazines_add, "create magazines")
+    sub.add_argument("--name")
+    sub.add_argument("--category")
+    source(sub)
+
+    articles = groups.add_parser("articles").add_subparsers(dest="command", required=True)
+    sub = command(articles, "list", articles_list, "list articles")
+    filters = sub.add_mutually_exclusive_group()
+    filters.add_argument("--author-id", type=int)
+    filters.add_argument("--magazine-id", type=int)
+    sub = command(articles, "add", articles_add, "create articles")
+    sub.add_argument("--title")
+    sub.add_argument("--author-id", type=int)
+    sub.add_argument("--magazine-id", type=int)
+    source(sub)
+    sub = command(articles, "search", articles_search, "full-text search on titles")
+    sub.add_argument("query")
+    sub.add_argument("--limit", type=int, default=20)
+
+    stats = groups.add_parser("stats").add_subparsers(dest="command", required=True)
+    sub = command(stats, "top-authors", stats_top_authors, "authors with the most articles")
+    sub.add_argument("-k", type=int, default=10)
+    command(stats, "magazines", stats_magazines, "article and author counts per magazine")
+    return parser
+
+
+def main(argv=None, out=None):
+    args = build_parser().parse_args(argv)
+    try:
+        with session(args.db, write=args.command == "add") as conn:
+            fields, records = args.handler(args, conn)
+            write_records(records, fields, args.format, out)
+    except (ValueError, OSError, sqlite3.Error) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,21 @@
+# Usage: python -m lib.scripts.upgrade [--db PATH] [--target VERSION]
+
+import argparse
+
+from lib.db.connection import DB_PATH
+from lib.db.migrate import upgrade
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations.")
+    parser.add_argument("--db", default=DB_PATH, help="database file (default: %(default)s)")
+    parser.add_argument("--target", type=int, help="stop after this migration number")
+    args = parser.parse_args(argv)
+
+    applied = upgrade(args.db, args.target)
+    if not applied:
+        print("Database is up to date.")
+    for number, name in applied:
+        print(f"Applied migration {number:04d}_{name}")
+
+if __name__ == "__main__":
+    main()
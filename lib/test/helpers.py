@@ -0,0 +1,22 @@
+import os
+import tempfile
+import unittest
+from contextlib import ExitStack
+
+from lib.db.connection import using_database
+from lib.db.migrate import upgrade
+
+
+class TempDatabaseTestCase(unittest.TestCase):
+    """Points the model layer at a throwaway database for each test."""
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self._tmpdir.name, "test.db")
+        self._database = ExitStack()
+        self._database.enter_context(using_database(self.db_path))
+        upgrade(self.db_path)
+
+    def tearDown(self):
+        self._database.close()
+        self._tmpdir.cleanup()
@@ -0,0 +1,124 @@
+"""Collect the SQL each model method issues and check its query plan.
+
+Every model method is driven through its benchmark in lib/bench/runner.py
+against a generated dataset, with instrumentation on so the statements are
+recorded. Each SELECT/UPDATE/DELETE is then run through EXPLAIN QUERY PLAN
+and any full table scan or temp B-tree sort is reported unless ALLOWLIST
+says the method is meant to do it.
+"""
+
+import re
+import shutil
+import sqlite3
+import tempfile
+
+from lib.bench import datagen, runner
+from lib.db import connection
+from lib.models.article import Article
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+
+MODELS = (Article, Author, Magazine)
+DATASET_ARTICLES = 20_000
+
+# method -> plan problems it is expected to have
+ALLOWLIST = {
+    "Article.all": {"SCAN articles"},
+    "Article.iter_all": {"SCAN articles"},
+    # Lists every magazine with its count; the count side is a lookup.
+    "Magazine.article_counts": {"SCAN m"},
+    # Reads the head of the rank index and stops at LIMIT 1.
+    "Author.top_author": {"SCAN c"},
+    # DISTINCT over the categories of one author's articles, not the table.
+    "Author.topic_areas": {"TEMP B-TREE FOR DISTINCT"},
+    "Author.prefetch": {"TEMP B-TREE FOR DISTINCT"},
+}
+
+_CHECKED = re.compile(r"^\s*(SELECT|WITH|UPDATE|DELETE|INSERT\b.*\bSELECT\b)", re.IGNORECASE | re.DOTALL)
+# "SCAN x" names the alias when there is one; virtual tables (FTS) and
+# constant rows are not table scans.
+_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW)(\w+)\b(?! VIRTUAL TABLE)")
+_TEMP_SORT = re.compile(r"^USE TEMP B-TREE FOR (ORDER BY|GROUP BY|DISTINCT|RIGHT PART OF ORDER BY)")
+
+
+def public_methods(models=MODELS):
+    """Every "Class.method" a caller can use, excluding the row factory."""
+    names = set()
+    for cls in models:
+        for name, value in vars(cls).items():
+            if name.startswith("_") or name == "from_row":
+                continue
+            if isinstance(value, classmethod) or callable(value):
+                names.add(f"{cls.__name__}.{name}")
+    return names
+
+
+def benchmark_method(name):
+    return name.split("[", 1)[0]
+
+
+def collect_statements(db_path, seed=0):
+    """Run every model benchmark once; return {method: set of normalized SQL}."""
+    workdir = tempfile.mkdtemp(prefix="articles-plans-")
+    work_db = f"{workdir}/plans.db"
+    shutil.copyfile(db_path, work_db)
+    statements = {}
+    try:
+        with connection.using_database(work_db):
+            ctx = runner.Context(seed)
+            connection.enable_instrumentation()
+            try:
+                for name, _, factory in runner.BENCHMARKS:
+                    if name.startswith("cli."):
+                        continue
+                    op = factory(ctx)
+                    connection.reset_instrumentation()
+                    op()
+                    sql = connection.instrumentation_stats()["sql"]
+                    statements.setdefault(benchmark_method(name), set()).update(
+                        s for s in sql if _CHECKED.match(s))
+            finally:
+                connection.disable_instrumentation()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return statements
+
+
+def explain(conn, sql):
+    # Normalized statements carry ? for every literal; the plan does not
+    # depend on the bound values, so NULLs will do.
+    rows = conn.execute("EXPLAIN QUERY PLAN " + sql, (None,) * sql.count("?")).fetchall()
+    return [row[-1] for row in rows]
+
+
+def plan_problems(plan):
+    problems = set()
+    for detail in plan:
+        scan = _SCAN.match(detail)
+        if scan:
+            problems.add(f"SCAN {scan.group(1)}")
+        sort = _TEMP_SORT.match(detail)
+        if sort:
+            problems.add(f"TEMP B-TREE FOR {sort.group(1)}")
+    return problems
+
+
+def check(db_path, statements, allowlist=ALLOWLIST):
+    """Return (method, sql, problems, plan) for every unexpected problem."""
+    failures = []
+    conn = sqlite3.connect(db_path)
+    try:
+        for method, sqls in sorted(statements.items()):
+            allowed = allowlist.get(method, set())
+            for sql in sorted(sqls):
+                plan = explain(conn, sql)
+                problems = plan_problems(plan) - allowed
+                if problems:
+                    failures.append((method, sql, sorted(problems), plan))
+    finally:
+        conn.close()
+    return failures
+
+
+def generate_dataset(directory, articles=DATASET_ARTICLES):
+    return datagen.generate(f"{directory}/dataset.db", articles)
@@ -0,0 +1,64 @@
+import unittest
+
+from lib.db.aggregates import rebuild, verify
+from lib.db.connection import get_connection_cm
+from lib.models.article import Article
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+from lib.test.helpers import TempDatabaseTestCase
+
+
+class TestAggregates(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ann, self.ben, self.cy = Author.create_many([("Ann",), ("Ben",), ("Cy",)])
+        self.daily, self.weekly, self.empty = Magazine.create_many(
+            [("Daily", "News"), ("Weekly", "Sport"), ("Empty", "None")])
+        self.articles = Article.create_many([
+            ("A1", self.ann.id, self.daily.id),
+            ("A2", self.ann.id, self.daily.id),
+            ("A3", self.ann.id, self.daily.id),
+            ("A4", self.ann.id, self.weekly.id),
+            ("B1", self.ben.id, self.daily.id),
+            ("C1", self.cy.id, self.weekly.id),
+        ])
+
+    def execute(self, sql, params=()):
+        with get_connection_cm() as conn:
+            conn.execute(sql, params)
+            conn.commit()
+
+    def test_queries_read_aggregates(self):
+        self.assertEqual(Author.top_author().name, "Ann")
+        counts = {c["name"]: c["article_count"] for c in Magazine.article_counts()}
+        self.assertEqual(counts, {"Daily": 4, "Weekly": 2, "Empty": 0})
+        self.assertEqual(sorted(m.name for m in Magazine.with_multiple_authors()), ["Daily", "Weekly"])
+        self.assertEqual([a.name for a in self.daily.contributing_authors()], ["Ann"])
+        self.assertEqual(sorted(a.name for a in self.daily.contributors()), ["Ann", "Ben"])
+        self.assertEqual(sorted(m.name for m in self.ann.magazines()), ["Daily", "Weekly"])
+        self.assertEqual(verify(), [])
+
+    def test_triggers_follow_updates_and_deletes(self):
+        a1, a2, a3, a4, b1, c1 = self.articles
+        self.execute("UPDATE articles SET author_id = ? WHERE id IN (?, ?)", (self.ben.id, a1.id, a2.id))
+        self.execute("DELETE FROM articles WHERE id = ?", (c1.id,))
+        self.execute("UPDATE articles SET magazine_id = NULL WHERE id = ?", (a4.id,))
+        self.assertEqual(verify(), [])
+        self.assertEqual(Author.top_author().name, "Ben")
+        self.assertEqual(Magazine.with_multiple_authors()[0].name, "Daily")
+        self.assertEqual([a.name for a in self.daily.contributing_authors()], ["Ben"])
+        counts = {c["name"]: c["article_count"] for c in Magazine.article_counts()}
+        self.assertEqual(counts["Weekly"], 0)
+
+    def test_verify_detects_drift_and_rebuild_repairs(self):
+        self.execute("UPDATE author_article_counts SET article_count = 99 WHERE author_id = ?", (self.ben.id,))
+        self.execute("DELETE FROM author_magazine_counts WHERE author_id = ?", (self.cy.id,))
+        drift = verify()
+        self.assertEqual({row[0] for row in drift}, {
+            "author_article_counts", "author_magazine_counts", "magazine_article_counts"})
+        rebuild()
+        self.assertEqual(verify(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from lib.db.connection import (
+    disable_instrumentation,
+    enable_instrumentation,
+    get_connection_cm,
+    instrumentation_stats,
+    reset_instrumentation,
+)
+from lib.models import aio
+from lib.models.aio import AsyncArticle, AsyncAuthor, AsyncMagazine, SQLiteExecutor
+from lib.test.helpers import TempDatabaseTestCase
+
+
+class TestAsyncModels(TempDatabaseTestCase):
+    def tearDown(self):
+        aio.shutdown()
+        super().tearDown()
+
+    def test_async_round_trip(self):
+        async def scenario():
+            author = await AsyncAuthor.create("Ann")
+            magazine = await AsyncMagazine.create("Daily", "News")
+            await AsyncAuthor.add_article(author, magazine, "Hello")
+            by_author, mags = await asyncio.gather(
+                AsyncArticle.find_by_author(author.id),
+                AsyncAuthor.magazines(author),
+            )
+            return by_author, mags
+
+        articles, mags = asyncio.run(scenario())
+        self.assertEqual([a.title for a in articles], ["Hello"])
+        self.assertEqual([m.name for m in mags], ["Daily"])
+
+    def test_async_calls_are_instrumented(self):
+        async def scenario():
+            author = await AsyncAuthor.create("Ann")
+            magazine = await AsyncMagazine.create("Daily", "News")
+            await AsyncArticle.create("Hello", author.id, magazine.id)
+            return await AsyncArticle.find_by_author(author.id)
+
+        enable_instrumentation()
+        reset_instrumentation()
+        try:
+            asyncio.run(scenario())
+            methods = instrumentation_stats()["methods"]
+        finally:
+            disable_instrumentation()
+        self.assertEqual(methods["Article.create"]["calls"], 1)
+        self.assertEqual(methods["Article.find_by_author"]["rows"], 1)
+
+    def test_run_transaction_rolls_back_on_error(self):
+        def failing(conn):
+            conn.execute("INSERT INTO authors (name) VALUES ('Ghost')")
+            raise RuntimeError("boom")
+
+        async def scenario():
+            with self.assertRaises(RuntimeError):
+                await aio.get_executor().run_transaction(failing)
+
+        asyncio.run(scenario())
+        with get_connection_cm() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM authors").fetchone()[0], 0)
+
+
+class TestSQLiteExecutor(unittest.TestCase):
+    def test_backpressure_bounds_in_flight_calls(self):
+        executor = SQLiteExecutor(max_workers=4, max_pending=2)
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0}
+
+        def work():
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.02)
+            with lock:
+                state["running"] -= 1
+
+        async def scenario():
+            await asyncio.gather(*(executor.run(work) for _ in range(8)))
+
+        asyncio.run(scenario())
+        executor.shutdown()
+        self.assertEqual(state["peak"], 2)
+
+    def test_cancelled_call_still_finishes(self):
+        executor = SQLiteExecutor(max_workers=1, max_pending=1)
+        started, finished = threading.Event(), threading.Event()
+
+        def work():
+            started.set()
+            time.sleep(0.05)
+            finished.set()
+
+        async def scenario():
+            task = asyncio.ensure_future(executor.run(work))
+            while not started.is_set():
+                await asyncio.sleep(0.001)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            # The slot frees only once the running call has completed.
+            await executor.run(lambda: None)
+            return finished.is_set()
+
+        self.assertTrue(asyncio.run(scenario()))
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,8 +7,8 @@ from lib.db.connection import get_connection
 import sqlite3
 import pytest
 import os
-from faker import Faker
-from random import random
+from random import choice, random
+from lib.db.seed import WORDS
 
 def insert_values(tbl, vals={}):
     conn = get_connection()
@@ -18,10 +18,8 @@ def insert_values(tbl, vals={}):
     for i in info:
         col, type = i
         if col in vals or col.count("_id") > 0 or col == 'id': continue
-        if hasattr(Faker, col):
-            vals[col] = getattr(Faker(), col)
-        elif type == "TEXT":
-            vals[col] = Faker().text(max_nb_chars=10)
+        if type == "TEXT":
+            vals[col] = choice(WORDS).capitalize()
         else:
             vals[col] = int(random())
 
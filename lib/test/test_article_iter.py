@@ -0,0 +1,53 @@
+import unittest
+
+from lib.db.connection import get_pool
+from lib.models.article import Article
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+from lib.test.helpers import TempDatabaseTestCase
+
+
+class TestArticleIterators(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author, other = Author.create_many([("Ann",), ("Ben",)])
+        self.magazine = Magazine.create("Daily", "News")
+        Article.create_many(
+            (f"T{i}", self.author.id if i % 2 else other.id, self.magazine.id)
+            for i in range(25)
+        )
+
+    def test_iter_all_matches_all(self):
+        streamed = [(a.id, a.title) for a in Article.iter_all(chunk_size=4)]
+        self.assertEqual(streamed, [(a.id, a.title) for a in Article.all()])
+
+    def test_iter_by_author_raw_tuples(self):
+        rows = list(Article.iter_by_author(self.author.id, chunk_size=5, raw=True))
+        self.assertEqual(len(rows), 12)
+        self.assertIs(type(rows[0]), tuple)
+        self.assertTrue(all(row[2] == self.author.id for row in rows))
+
+    def test_iter_by_magazine(self):
+        self.assertEqual(len(list(Article.iter_by_magazine(self.magazine.id))), 25)
+
+    def test_connection_returned_when_iteration_stops(self):
+        pool = get_pool(readonly=True)
+        stream = Article.iter_all(chunk_size=2)
+        next(stream)
+        self.assertEqual(pool.stats()["idle"], pool.stats()["size"] - 1)
+        stream.close()
+        self.assertEqual(pool.stats()["idle"], pool.stats()["size"])
+
+    def test_interleaved_streams_share_one_connection(self):
+        pool = get_pool(readonly=True)
+        first = Article.iter_all(chunk_size=3)
+        second = Article.iter_all(chunk_size=3)
+        next(first)
+        next(second)
+        first.close()
+        self.assertEqual(len(list(second)), 24)
+        self.assertEqual(pool.stats()["idle"], pool.stats()["size"])
+
+
+if __name__ == "__main__":
+    unittest.main()
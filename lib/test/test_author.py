@@ -5,6 +5,7 @@ from lib.models.author import Author
 from lib.models.magazine import Magazine
 from lib.models.article import Article
 from lib.db.connection import get_connection
+from lib.test.helpers import TempDatabaseTestCase
 
 # Add root path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
@@ -51,5 +52,43 @@ class TestAuthor(unittest.TestCase):
         topics = self.author.topic_areas()
         self.assertIn("Test Category", topics)
 
+
+class TestAuthorModel(TempDatabaseTestCase):
+    # Formerly defined in lib/models/author.py.
+    def setUp(self):
+        super().setUp()
+        self.author = Author.create("Jane Doe")
+        self.mag1 = Magazine.create("Nature Weekly", "Science")
+        self.mag2 = Magazine.create("Tech Digest", "Technology")
+
+    def test_create_author(self):
+        self.assertIsInstance(self.author, Author)
+        self.assertEqual(self.author.name, "Jane Doe")
+
+    def test_add_article(self):
+        article = self.author.add_article(self.mag1, "Climate Change")
+        self.assertIsInstance(article, Article)
+        self.assertEqual(article.title, "Climate Change")
+
+    def test_articles_method(self):
+        self.author.add_article(self.mag1, "A1")
+        self.author.add_article(self.mag2, "A2")
+        self.assertEqual(len(self.author.articles()), 2)
+
+    def test_magazines_method(self):
+        self.author.add_article(self.mag1, "Sci A")
+        self.author.add_article(self.mag2, "Tech B")
+        magazine_names = [mag.name for mag in self.author.magazines()]
+        self.assertIn("Nature Weekly", magazine_names)
+        self.assertIn("Tech Digest", magazine_names)
+
+    def test_topic_areas(self):
+        self.author.add_article(self.mag1, "X")
+        self.author.add_article(self.mag2, "Y")
+        categories = self.author.topic_areas()
+        self.assertIn("Science", categories)
+        self.assertIn("Technology", categories)
+
+
 if __name__ == "__main__":
     unittest.main()
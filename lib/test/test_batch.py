@@ -0,0 +1,96 @@
+import csv
+import io
+import json
+import os
+import unittest
+
+from lib.db import connection
+from lib.db.migrate import upgrade
+from lib.models.article import Article
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+from lib.scripts import batch
+from lib.test.helpers import TempDatabaseTestCase
+
+
+class TestBatchCli(TempDatabaseTestCase):
+    def run_cli(self, *argv):
+        out = io.StringIO()
+        status = batch.main(list(argv), out=out)
+        return status, out.getvalue()
+
+    def jsonl(self, *argv):
+        status, text = self.run_cli(*argv)
+        self.assertEqual(status, 0)
+        return [json.loads(line) for line in text.splitlines()]
+
+    def write_file(self, name, text):
+        path = os.path.join(self._tmpdir.name, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_add_and_list_authors(self):
+        self.assertEqual(self.jsonl("authors", "add", "--name", "Ann"), [{"id": 1, "name": "Ann"}])
+        path = self.write_file("authors.jsonl", '{"name": "Ben"}\n{"name": "Cy"}\n')
+        self.jsonl("authors", "add", "--from", path)
+        self.assertEqual([a["name"] for a in self.jsonl("authors", "list")], ["Ann", "Ben", "Cy"])
+
+    def test_articles_from_csv_and_formats(self):
+        author = Author.create("Ann")
+        magazine = Magazine.create("Nature", "Science")
+        path = self.write_file("articles.csv", "title,author_id,magazine_id\n"
+                               f"First,{author.id},{magazine.id}\nSecond,{author.id},{magazine.id}\n")
+        status, text = self.run_cli("--format", "json", "articles", "add", "--from", path)
+        self.assertEqual(status, 0)
+        self.assertEqual([a["title"] for a in json.loads(text)], ["First", "Second"])
+
+        status, text = self.run_cli("--format", "csv", "articles", "list", "--author-id", str(author.id))
+        rows = list(csv.DictReader(io.StringIO(text)))
+        self.assertEqual([r["title"] for r in rows], ["First", "Second"])
+
+        status, text = self.run_cli("--format", "json", "authors", "list")
+        self.assertEqual(json.loads(text), [{"id": author.id, "name": "Ann"}])
+
+    def test_list_magazines_by_category(self):
+        Magazine.create_many([("Nature", "Science"), ("Vogue", "Fashion"), ("Cell", "Science")])
+        self.assertEqual([m["name"] for m in self.jsonl("magazines", "list", "--category", "Science")],
+                         ["Nature", "Cell"])
+        self.assertEqual(self.jsonl("magazines", "list", "--category", "Sports"), [])
+        self.assertEqual(len(self.jsonl("magazines", "list")), 3)
+
+    def test_stats(self):
+        ann, ben = Author.create_many([("Ann",), ("Ben",)])
+        magazine = Magazine.create("Nature", "Science")
+        Article.create_many([("A", ann.id, magazine.id), ("B", ben.id, magazine.id), ("C", ben.id, magazine.id)])
+        self.assertEqual(self.jsonl("stats", "top-authors", "-k", "1"),
+                         [{"id": ben.id, "name": "Ben", "article_count": 2}])
+        self.assertEqual(self.jsonl("stats", "magazines"),
+                         [{"id": magazine.id, "name": "Nature", "article_count": 3, "author_count": 2}])
+
+    def test_bad_input_writes_nothing(self):
+        path = self.write_file("authors.csv", "name\nAnn\n\n,\n")
+        status, _ = self.run_cli("authors", "add", "--from", path)
+        self.assertEqual(status, 2)
+        self.assertEqual(self.jsonl("authors", "list"), [])
+
+    def test_session_restores_database(self):
+        other = os.path.join(self._tmpdir.name, "other.db")
+        upgrade(other)
+        with batch.session(other, write=False):
+            self.assertEqual(connection.DB_PATH, other)
+        self.assertEqual(connection.DB_PATH, self.db_path)
+        with self.assertRaises(RuntimeError):
+            with batch.session(other):
+                raise RuntimeError("boom")
+        self.assertEqual(connection.DB_PATH, self.db_path)
+
+    def test_one_connection_per_run(self):
+        Author.create("Ann")
+        connection.close_pools()
+        self.jsonl("authors", "list")
+        self.assertEqual(connection.get_pool().stats()["size"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
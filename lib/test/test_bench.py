@@ -0,0 +1,42 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from lib.bench import datagen, runner
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_datasets_are_deterministic(self):
+        first = datagen.generate(os.path.join(self.tmpdir.name, "a.db"), 500, seed=7)
+        second = datagen.generate(os.path.join(self.tmpdir.name, "b.db"), 500, seed=7)
+        rows = []
+        for path in (first, second):
+            conn = sqlite3.connect(path)
+            rows.append(conn.execute("SELECT * FROM articles ORDER BY id").fetchall())
+            conn.close()
+        self.assertEqual(len(rows[0]), 500)
+        self.assertEqual(rows[0], rows[1])
+
+    def test_every_benchmark_runs(self):
+        dataset = datagen.ensure_dataset(self.tmpdir.name, 1000)
+        results = runner.run(dataset, iterations=2, scan_iterations=1)
+        self.assertEqual(set(results), {name for name, _, _ in runner.BENCHMARKS})
+        for result in results.values():
+            self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+
+    def test_compare_flags_regressions(self):
+        baseline = {"op": {"p50_ms": 1.0, "p95_ms": 2.0}}
+        current = {"op": {"p50_ms": 1.1, "p95_ms": 3.0}}
+        regressions = runner.compare(current, baseline, threshold=0.25)
+        self.assertEqual([(r["benchmark"], r["metric"]) for r in regressions], [("op", "p95_ms")])
+
+
+if __name__ == "__main__":
+    unittest.main()
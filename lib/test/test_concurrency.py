@@ -0,0 +1,88 @@
+import sqlite3
+import threading
+import time
+import unittest
+from unittest import mock
+
+from lib.bench import stress
+from lib.db import connection
+from lib.db.connection import get_connection_cm, retry_on_busy, transaction
+from lib.models.author import Author
+from lib.test.helpers import TempDatabaseTestCase
+
+
+def locked():
+    return sqlite3.OperationalError("database is locked")
+
+
+class TestConcurrency(TempDatabaseTestCase):
+    def other_writer(self):
+        conn = sqlite3.connect(self.db_path, timeout=0, isolation_level=None, check_same_thread=False)
+        self.addCleanup(conn.close)
+        return conn
+
+    def test_threads_and_processes_hammer_without_failures(self):
+        report = stress.run(self.db_path, writers=3, readers=3, ops=60, processes=2)
+        self.assertEqual(report["errors"], [])
+        self.assertEqual((report["writes"], report["reads"]), (540, 540))
+        with get_connection_cm() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0], 540)
+
+    def test_transaction_takes_the_write_lock_up_front(self):
+        other = self.other_writer()
+        with transaction():
+            with self.assertRaisesRegex(sqlite3.OperationalError, "locked"):
+                other.execute("BEGIN IMMEDIATE")
+        with transaction(immediate=False):
+            other.execute("BEGIN IMMEDIATE")
+            other.execute("ROLLBACK")
+
+    def test_write_waits_for_a_held_lock(self):
+        other = self.other_writer()
+        other.execute("BEGIN IMMEDIATE")
+        threading.Timer(0.2, other.execute, ("COMMIT",)).start()
+        started = time.monotonic()
+        Author.create("Ann")
+        self.assertGreaterEqual(time.monotonic() - started, 0.15)
+        self.assertEqual(Author.find_by_name("Ann").name, "Ann")
+
+    @mock.patch.object(connection, "BUSY_BACKOFF", 0)
+    def test_retry_on_busy(self):
+        calls = []
+
+        @retry_on_busy
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise locked()
+            return "done"
+
+        self.assertEqual(flaky(), "done")
+        self.assertEqual(len(calls), 3)
+
+        calls.clear()
+        with self.assertRaises(sqlite3.OperationalError):
+            with transaction():
+                flaky()
+        self.assertEqual(len(calls), 1)
+
+    @mock.patch.object(connection, "BUSY_BACKOFF", 0)
+    def test_retry_gives_up_and_ignores_other_errors(self):
+        calls = []
+
+        @retry_on_busy
+        def failing(exc):
+            calls.append(1)
+            raise exc
+
+        with self.assertRaises(sqlite3.OperationalError):
+            failing(locked())
+        self.assertEqual(len(calls), connection.BUSY_RETRIES + 1)
+        calls.clear()
+        with self.assertRaises(sqlite3.OperationalError):
+            failing(sqlite3.OperationalError("no such table: nope"))
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
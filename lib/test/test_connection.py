@@ -0,0 +1,169 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from unittest import mock
+
+from lib.db import connection
+from lib.db.connection import (
+    PROFILE_ENV,
+    ConnectionPool,
+    PoolTimeout,
+    SchemaOutOfDate,
+    close_pools,
+    get_connection_cm,
+    resolve_profile,
+    transaction,
+)
+from lib.db.migrate import upgrade
+from lib.test.helpers import TempDatabaseTestCase
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "pool.db")
+        upgrade(self.db_path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_connection_is_reused(self):
+        pool = ConnectionPool(self.db_path, max_size=2)
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            pass
+        self.assertIs(first, second)
+        self.assertEqual(pool.stats()["size"], 1)
+        pool.close()
+
+    def test_nested_checkout_returns_same_connection(self):
+        pool = ConnectionPool(self.db_path, max_size=1)
+        with pool.connection() as outer:
+            with pool.connection() as inner:
+                self.assertIs(outer, inner)
+        pool.close()
+
+    def test_pool_is_bounded(self):
+        pool = ConnectionPool(self.db_path, max_size=1, timeout=0.05)
+        conn = pool.checkout()
+        errors = []
+
+        def worker():
+            try:
+                pool.checkout()
+            except PoolTimeout as exc:
+                errors.append(exc)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        self.assertEqual(len(errors), 1)
+        pool.checkin(conn)
+        pool.close()
+
+    def test_broken_connection_is_replaced(self):
+        pool = ConnectionPool(self.db_path, max_size=1)
+        with pool.connection() as conn:
+            pass
+        conn.close()
+        with pool.connection() as fresh:
+            self.assertIsNot(fresh, conn)
+            self.assertEqual(fresh.execute("SELECT 1").fetchone()[0], 1)
+        pool.close()
+
+    def test_uncommitted_work_is_rolled_back_on_checkin(self):
+        pool = ConnectionPool(self.db_path, max_size=1)
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO authors (name) VALUES (?)", ("Ghost",))
+        with pool.connection() as conn:
+            count = conn.execute("SELECT COUNT(*) FROM authors").fetchone()[0]
+        self.assertEqual(count, 0)
+        pool.close()
+
+
+class TestSchemaCheck(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "old.db")
+
+    def tearDown(self):
+        close_pools()
+        self.tmpdir.cleanup()
+
+    def test_unmigrated_database_is_refused(self):
+        upgrade(self.db_path, target=2)
+        for readonly in (False, True):
+            with self.assertRaisesRegex(SchemaOutOfDate, "lib.scripts.upgrade"):
+                with get_connection_cm(self.db_path, readonly=readonly):
+                    pass
+        upgrade(self.db_path)
+        with get_connection_cm(self.db_path, readonly=True) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM articles_fts").fetchone()[0], 0)
+
+
+class TestModeSwitches(TempDatabaseTestCase):
+    def test_switching_with_a_connection_held_is_refused(self):
+        switches = (
+            connection.enable_instrumentation,
+            connection.enable_memory_mode,
+            connection.enable_read_snapshot,
+            lambda: connection.enable_slow_query_log(0, os.path.join(self._tmpdir.name, "slow.log")),
+        )
+        for hold in (get_connection_cm, transaction):
+            for switch in switches:
+                with hold():
+                    with self.assertRaises(RuntimeError):
+                        switch()
+        self.assertFalse(connection.instrumentation.enabled)
+        self.assertIsNone(connection._memory)
+
+        connection.enable_instrumentation()
+        with transaction():
+            with self.assertRaises(RuntimeError):
+                connection.disable_instrumentation()
+        connection.disable_instrumentation()
+        self.assertFalse(connection.instrumentation.enabled)
+
+
+class TestConnectionProfiles(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "profiles.db")
+        upgrade(self.db_path)
+
+    def tearDown(self):
+        close_pools()
+        self.tmpdir.cleanup()
+
+    def pragma(self, conn, name):
+        return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+    def test_default_profile_uses_wal_and_mmap(self):
+        pool = ConnectionPool(self.db_path)
+        with pool.connection() as conn:
+            self.assertEqual(self.pragma(conn, "journal_mode"), "wal")
+            self.assertEqual(self.pragma(conn, "synchronous"), 1)
+            self.assertGreater(self.pragma(conn, "mmap_size"), 0)
+        pool.close()
+
+    def test_profile_per_call(self):
+        with get_connection_cm(self.db_path, profile="bulk-load") as conn:
+            self.assertEqual(self.pragma(conn, "synchronous"), 0)
+        with get_connection_cm(self.db_path, profile="durable") as conn:
+            self.assertEqual(self.pragma(conn, "synchronous"), 2)
+
+    def test_profile_from_environment(self):
+        with mock.patch.dict(os.environ, {PROFILE_ENV: "durable"}):
+            self.assertEqual(resolve_profile(), "durable")
+            self.assertEqual(resolve_profile("bulk-load"), "bulk-load")
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            resolve_profile("turbo")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from lib.db.connection import get_connection_cm
+from lib.models.article import Article
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+from lib.test.helpers import TempDatabaseTestCase
+
+
+class TestCreateMany(TempDatabaseTestCase):
+    def test_authors_get_their_ids(self):
+        Author.create("Existing")
+        authors = Author.create_many([("Ann",), ("Ben",), ("Cy",)])
+        self.assertEqual([a.name for a in authors], ["Ann", "Ben", "Cy"])
+        for author in authors:
+            self.assertEqual(Author.find_by_name(author.name).id, author.id)
+
+    def test_articles_from_generator(self):
+        author = Author.create("Writer")
+        magazine, other = Magazine.create_many([("Daily", "News"), ("Weekly", "Sport")])
+        articles = Article.create_many(
+            (f"Title {i}", author.id, magazine.id) for i in range(50)
+        )
+        self.assertEqual(len(articles), 50)
+        self.assertEqual(len({a.id for a in articles}), 50)
+        stored = {a.id: a.title for a in Article.find_by_magazine(magazine.id)}
+        self.assertEqual(stored, {a.id: a.title for a in articles})
+        self.assertEqual(Article.find_by_magazine(other.id), [])
+
+    def test_empty_input(self):
+        self.assertEqual(Article.create_many([]), [])
+
+    def test_failed_batch_writes_nothing(self):
+        with self.assertRaises(Exception):
+            Author.create_many([("Ok",), (None,)])
+        with get_connection_cm() as conn:
+            count = conn.execute("SELECT COUNT(*) FROM authors").fetchone()[0]
+        self.assertEqual(count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
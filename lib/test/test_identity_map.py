@@ -0,0 +1,131 @@
+import unittest
+
+from lib.db.connection import get_connection_cm, transaction
+from lib.models.article import Article
+from lib.models.author import Author
+from lib.models.identity_map import IdentityMap, identity_map
+from lib.models.magazine import Magazine
+from lib.test.helpers import TempDatabaseTestCase
+
+
+class TestIdentityMap(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        identity_map.enable()
+        identity_map.clear()
+
+    def tearDown(self):
+        identity_map.disable()
+        super().tearDown()
+
+    def test_repeat_lookup_is_served_from_map(self):
+        author = Author.create("Jane")
+        first = Author.find_by_id(author.id)
+        second = Author.find_by_id(author.id)
+        self.assertIs(first, second)
+        stats = identity_map.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_row_loads_are_counted(self):
+        Author.create_many([("Ann",), ("Ben",)])
+        Author.page()
+        Author.page()
+        stats = identity_map.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 2))
+
+    def test_rollback_evicts_but_keeps_stats(self):
+        author = Author.create("Jane")
+        Author.find_by_id(author.id)
+        Author.find_by_id(author.id)
+        with self.assertRaises(RuntimeError):
+            with transaction():
+                Author.create("Ghost")
+                raise RuntimeError("boom")
+        stats = identity_map.stats()
+        self.assertEqual((stats["size"], stats["hits"], stats["misses"]), (0, 1, 1))
+
+    def test_join_results_share_instances(self):
+        author = Author.create("Jane")
+        magazine = Magazine.create("Weekly", "News")
+        author.add_article(magazine, "One")
+        author.add_article(magazine, "Two")
+        cached = Magazine.find_by_id(magazine.id)
+        self.assertIs(author.magazines()[0], cached)
+
+    def test_save_invalidates(self):
+        author = Author.create("Before")
+        Author.find_by_id(author.id)
+        author.name = "After"
+        author.save()
+        self.assertEqual(Author.find_by_id(author.id).name, "After")
+
+        magazine = Magazine.create("Old", "News")
+        Magazine.find_by_id(magazine.id)
+        magazine.name = "New"
+        magazine.save()
+        self.assertEqual(Magazine.find_by_id(magazine.id).name, "New")
+
+    def test_new_articles_expire_prefetched_relations(self):
+        author = Author.create("Jane")
+        weekly = Magazine.create("Weekly", "News")
+        monthly = Magazine.create("Monthly", "Science")
+        author.add_article(weekly, "One")
+
+        [prefetched] = Author.prefetch([Author.find_by_id(author.id)], "articles", "magazines")
+        self.assertEqual([a.title for a in prefetched.articles()], ["One"])
+        prefetched.add_article(monthly, "Two")
+        self.assertEqual([a.title for a in prefetched.articles()], ["One", "Two"])
+
+        Author.prefetch([prefetched], "articles", "magazines")
+        again = Author.find_by_id(author.id)
+        self.assertIs(again, prefetched)
+        Article.create("Three", author.id, weekly.id)
+        self.assertEqual([a.title for a in again.articles()], ["One", "Two", "Three"])
+        self.assertEqual(sorted(m.name for m in again.magazines()), ["Monthly", "Weekly"])
+
+    def test_prefetches_survive_lookups(self):
+        ann, ben = Author.create_many([("Ann",), ("Ben",)])
+        daily, weekly = Magazine.create_many([("Daily", "News"), ("Weekly", "Sport")])
+        Article.create_many([("A", ann.id, daily.id), ("B", ben.id, weekly.id)])
+        authors = Author.prefetch(Author.page().items, "articles")
+        # Loading contributors hands the same cached authors out again.
+        Magazine.prefetch(Magazine.page().items, "contributors")
+
+        statements = []
+        with get_connection_cm() as conn:
+            conn.set_trace_callback(statements.append)
+            try:
+                titles = [[a.title for a in author.articles()] for author in authors]
+            finally:
+                conn.set_trace_callback(None)
+        self.assertEqual(statements, [])
+        self.assertEqual(titles, [["A"], ["B"]])
+
+        Article.create_many([("C", ann.id, weekly.id)])
+        self.assertEqual([a.title for a in authors[0].articles()], ["A", "C"])
+        self.assertEqual([a.title for a in authors[1].articles()], ["B"])
+
+    def test_missing_row(self):
+        self.assertIsNone(Author.find_by_id(12345))
+
+
+class TestIdentityMapLRU(unittest.TestCase):
+    def test_least_recently_used_is_evicted(self):
+        cache = IdentityMap(maxsize=2)
+        cache.enable()
+        a = cache.load(Author, (1, "a"))
+        cache.load(Author, (2, "b"))
+        cache.get(Author, 1)
+        cache.load(Author, (3, "c"))
+        self.assertIs(cache.get(Author, 1), a)
+        self.assertIsNone(cache.get(Author, 2))
+
+    def test_disabled_map_does_not_cache(self):
+        cache = IdentityMap()
+        cache.load(Author, (1, "a"))
+        self.assertIsNone(cache.get(Author, 1))
+        self.assertEqual(cache.stats()["misses"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import json
+import os
+import unittest
+
+from lib.db import importer
+from lib.db.aggregates import verify
+from lib.db.connection import get_connection_cm
+from lib.test.helpers import TempDatabaseTestCase
+
+
+class Interrupt(Exception):
+    pass
+
+
+class TestImporter(TempDatabaseTestCase):
+    def write_file(self, name, text):
+        path = os.path.join(self._tmpdir.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def jsonl(self, name, records):
+        return self.write_file(name, "".join(json.dumps(r) + "\n" for r in records))
+
+    def titles(self):
+        with get_connection_cm() as conn:
+            return [row[0] for row in conn.execute("SELECT title FROM articles ORDER BY id")]
+
+    def interrupt_after(self, chunks):
+        calls = []
+
+        def progress(rows, rate):
+            calls.append(rows)
+            if len(calls) == chunks:
+                raise Interrupt
+        return progress
+
+    def test_csv_articles_resolve_names(self):
+        path = self.write_file("feed.csv", "title,author,magazine,category\n"
+                               "One,Ann,Nature,Science\n"
+                               '"Two, with comma",Ben,Nature,Science\n'
+                               "Three,Ann,Wired,Tech\n")
+        summary = importer.import_file("articles", path)
+        self.assertEqual(summary["imported"], 3)
+        self.assertEqual(self.titles(), ["One", "Two, with comma", "Three"])
+        with get_connection_cm() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM authors").fetchone()[0], 2)
+            magazines = conn.execute("SELECT name, category FROM magazines ORDER BY id")
+            self.assertEqual([tuple(row) for row in magazines], [("Nature", "Science"), ("Wired", "Tech")])
+        self.assertEqual(verify(), [])
+
+    def test_resumes_after_interruption(self):
+        path = self.jsonl("feed.jsonl", [
+            {"title": f"T{i}", "author": "Ann", "magazine": "Nature"} for i in range(25)])
+        with self.assertRaises(Interrupt):
+            importer.import_file("articles", path, chunk_size=10, progress=self.interrupt_after(2))
+        self.assertEqual(len(self.titles()), 20)
+
+        summary = importer.import_file("articles", path, chunk_size=10)
+        self.assertEqual((summary["imported"], summary["total"]), (5, 25))
+        self.assertEqual(self.titles(), [f"T{i}" for i in range(25)])
+
+    def test_csv_resume_keeps_header(self):
+        path = self.write_file("authors.csv", "name\n" + "".join(f"A{i}\n" for i in range(7)))
+        with self.assertRaises(Interrupt):
+            importer.import_file("authors", path, chunk_size=3, progress=self.interrupt_after(1))
+        importer.import_file("authors", path, chunk_size=3)
+        with get_connection_cm() as conn:
+            names = [row[0] for row in conn.execute("SELECT name FROM authors ORDER BY id")]
+        self.assertEqual(names, [f"A{i}" for i in range(7)])
+
+    def test_rerun_picks_up_appended_records(self):
+        path = self.jsonl("feed.jsonl", [{"name": "Nature", "category": "Science"}])
+        importer.import_file("magazines", path)
+        self.assertEqual(importer.import_file("magazines", path)["imported"], 0)
+        with open(path, "a") as f:
+            f.write(json.dumps({"name": "Wired", "category": "Tech"}) + "\n")
+        summary = importer.import_file("magazines", path)
+        self.assertEqual((summary["imported"], summary["total"]), (1, 2))
+        self.assertEqual(importer.import_file("magazines", path, restart=True)["imported"], 2)
+
+    def test_bad_record_keeps_committed_chunks(self):
+        records = [{"title": f"T{i}", "author_id": 1, "magazine_id": 1} for i in range(5)]
+        records[3] = {"title": "Broken", "author_id": "x", "magazine_id": 1}
+        path = self.jsonl("feed.jsonl", records)
+        with self.assertRaisesRegex(importer.FeedError, "record 4"):
+            importer.import_file("articles", path, chunk_size=2)
+        self.assertEqual(self.titles(), ["T0", "T1"])
+        with get_connection_cm() as conn:
+            self.assertEqual(importer.checkpoint(conn, os.path.abspath(path))[1], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import os
+import unittest
+
+from lib.db import connection
+from lib.db.connection import (
+    disable_instrumentation,
+    disable_slow_query_log,
+    enable_instrumentation,
+    enable_slow_query_log,
+    get_connection_cm,
+    instrumentation_stats,
+    normalize_sql,
+    parameter_shape,
+    reset_instrumentation,
+    slow_query_log,
+)
+from lib.models.article import Article
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+from lib.test.helpers import TempDatabaseTestCase
+
+
+class TestNormalizeSql(unittest.TestCase):
+    def test_literals_and_whitespace(self):
+        self.assertEqual(
+            normalize_sql("SELECT *\n  FROM articles WHERE id = 42 AND title = 'it''s';"),
+            "SELECT * FROM articles WHERE id = ? AND title = ?",
+        )
+
+    def test_identifiers_with_digits_are_kept(self):
+        self.assertEqual(normalize_sql("SELECT 1 FROM t2"), "SELECT ? FROM t2")
+
+
+class TestInstrumentation(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = Author.create("Ann")
+        self.magazine = Magazine.create("Nature", "Science")
+        Article.create_many([(f"Title {i}", self.author.id, self.magazine.id) for i in range(3)])
+        enable_instrumentation()
+        reset_instrumentation()
+
+    def tearDown(self):
+        disable_instrumentation()
+        super().tearDown()
+
+    def test_disabled_connections_are_plain(self):
+        disable_instrumentation()
+        with get_connection_cm() as conn:
+            self.assertIs(type(conn), connection.TransactionalConnection)
+        self.assertFalse(hasattr(vars(Article)["find_by_author"].__func__, "__wrapped__"))
+
+    def test_method_counters(self):
+        Article.find_by_author(self.author.id)
+        Article.find_by_author(self.author.id)
+        self.author.magazines()
+        methods = instrumentation_stats()["methods"]
+        self.assertEqual(methods["Article.find_by_author"]["calls"], 2)
+        self.assertEqual(methods["Article.find_by_author"]["rows"], 6)
+        self.assertEqual(methods["Author.magazines"]["calls"], 1)
+        self.assertEqual(sum(methods["Article.find_by_author"]["histogram"].values()), 2)
+
+    def test_rows_for_pages_and_streams(self):
+        Article.page(limit=2)
+        self.assertEqual(len(list(Article.iter_by_author(self.author.id, chunk_size=2))), 3)
+        stream = Article.iter_all()
+        next(stream)
+        stream.close()
+        methods = instrumentation_stats()["methods"]
+        self.assertEqual(methods["Article.page"]["rows"], 2)
+        self.assertEqual(methods["Article.iter_by_author"]["rows"], 3)
+        self.assertEqual((methods["Article.iter_all"]["calls"], methods["Article.iter_all"]["rows"]), (1, 1))
+
+    def test_sql_counters_group_by_normalized_statement(self):
+        with get_connection_cm() as conn:
+            conn.execute("SELECT title FROM articles WHERE id = 1").fetchall()
+            conn.execute("SELECT title FROM articles WHERE id = 2").fetchall()
+            rows = list(conn.execute("SELECT title FROM articles"))
+        self.assertEqual(len(rows), 3)
+        sql = instrumentation_stats()["sql"]
+        self.assertEqual(sql["SELECT title FROM articles WHERE id = ?"]["calls"], 2)
+        self.assertEqual(sql["SELECT title FROM articles WHERE id = ?"]["rows"], 2)
+        self.assertEqual(sql["SELECT title FROM articles"]["rows"], 3)
+
+    def test_statements_outside_cursors_are_counted(self):
+        Author.create("Ben")
+        sql = instrumentation_stats()["sql"]
+        self.assertEqual(sql["INSERT INTO authors (name) VALUES (?)"]["calls"], 1)
+        self.assertIn("COMMIT", sql)
+
+    def test_format_lists_slowest(self):
+        Article.find_by_author(self.author.id)
+        text = connection.format_instrumentation_stats()
+        self.assertIn("Article.find_by_author", text)
+        self.assertIn("SELECT", text)
+
+
+class TestSlowQueryLog(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = Author.create("Ann")
+        self.magazine = Magazine.create("Nature", "Science")
+        Article.create_many([(f"Title {i}", self.author.id, self.magazine.id) for i in range(3)])
+        self.log_path = os.path.join(self._tmpdir.name, "slow.log")
+        enable_slow_query_log(0, self.log_path)
+
+    def tearDown(self):
+        disable_slow_query_log()
+        super().tearDown()
+
+    def read_log(self):
+        with open(self.log_path) as f:
+            return f.read()
+
+    def test_parameter_shape(self):
+        self.assertEqual(parameter_shape((1, "x", None)), "(int, str, NoneType)")
+        self.assertEqual(parameter_shape({"id": 1}), "{id: int}")
+
+    def test_full_scan_is_flagged_with_plan(self):
+        Article.all()
+        log = self.read_log()
+        self.assertIn("FULL SCAN articles", log)
+        self.assertIn("plan: SCAN articles", log)
+        self.assertGreaterEqual(slow_query_log.flagged, 1)
+
+    def test_aliased_full_scan_is_flagged(self):
+        with get_connection_cm() as conn:
+            conn.execute("SELECT ar.title FROM articles ar JOIN authors au ON au.id = ar.author_id "
+                         "WHERE ar.title LIKE ?", ("%1",)).fetchall()
+            flagged = slow_query_log.flagged
+            conn.execute("SELECT au.name FROM authors AS au WHERE au.name LIKE ?", ("A%",)).fetchall()
+        log = self.read_log()
+        self.assertIn("plan: SCAN ar", log)
+        self.assertIn("FULL SCAN articles", log)
+        self.assertGreaterEqual(flagged, 1)
+        # A scan of another aliased table is not an articles scan.
+        self.assertEqual(slow_query_log.flagged, flagged)
+
+    def test_indexed_lookup_logs_shape_not_values(self):
+        Author.find_by_name("Ann")
+        log = self.read_log()
+        self.assertIn("params=(str)", log)
+        self.assertIn("SELECT id, name FROM authors WHERE name = ?", log)
+        self.assertIn("plan: SEARCH authors USING", log)
+        self.assertNotIn("Ann", log)
+
+    def test_threshold_filters_fast_statements(self):
+        enable_slow_query_log(60_000, self.log_path)
+        Article.all()
+        self.assertNotIn("SCAN articles", self.read_log())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import sqlite3
+import threading
+import time
+import unittest
+
+from lib.db import connection
+from lib.db.connection import get_connection_cm, transaction
+from lib.models.article import Article
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+from lib.test.helpers import TempDatabaseTestCase
+
+
+class TestMemoryMode(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = Author.create("Ann")
+        self.magazine = Magazine.create("Nature", "Science")
+
+    def tearDown(self):
+        connection.disable_memory_mode(persist=False)
+        super().tearDown()
+
+    def on_disk(self, sql, params=()):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def test_queries_are_served_from_memory(self):
+        connection.enable_memory_mode()
+        with get_connection_cm() as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "memory")
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("INSERT INTO authors (name) VALUES ('Disk only')")
+        conn.commit()
+        conn.close()
+        self.assertIsNone(Author.find_by_name("Disk only"))
+        self.assertEqual(Author.find_by_name("Ann").id, self.author.id)
+
+    def test_writes_reach_the_file_on_checkpoint(self):
+        connection.enable_memory_mode()
+        self.author.add_article(self.magazine, "In memory")
+        self.assertEqual(self.on_disk("SELECT COUNT(*) FROM articles"), [(0,)])
+        connection.checkpoint_memory()
+        self.assertEqual(self.on_disk("SELECT title FROM articles"), [("In memory",)])
+        self.assertEqual(self.on_disk("PRAGMA integrity_check"), [("ok",)])
+        self.assertEqual(self.on_disk("PRAGMA journal_mode"), [("wal",)])
+
+    def test_disable_persists_and_returns_to_the_file(self):
+        connection.enable_memory_mode()
+        Author.create("Ben")
+        connection.disable_memory_mode()
+        self.assertEqual(self.on_disk("SELECT name FROM authors WHERE name = 'Ben'"), [("Ben",)])
+        with get_connection_cm() as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertIsNotNone(Author.find_by_name("Ben"))
+
+    def test_periodic_checkpoint(self):
+        connection.enable_memory_mode(interval=0.05)
+        Author.create("Ben")
+        deadline = time.monotonic() + 5
+        while not self.on_disk("SELECT 1 FROM authors WHERE name = 'Ben'"):
+            self.assertLess(time.monotonic(), deadline, "never checkpointed")
+            time.sleep(0.02)
+
+    def test_reads_do_not_fail_during_a_write(self):
+        connection.enable_memory_mode()
+        writing = threading.Event()
+        done = threading.Event()
+
+        def writer():
+            with transaction():
+                self.author.add_article(self.magazine, "Slow write")
+                writing.set()
+                done.wait(5)
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            writing.wait(5)
+            Article.find_by_magazine(self.magazine.id)
+            self.assertEqual(Author.find_by_name("Ann").id, self.author.id)
+        finally:
+            done.set()
+            thread.join()
+        self.assertEqual([a.title for a in Article.find_by_author(self.author.id)], ["Slow write"])
+
+
+if __name__ == "__main__":
+    unittest.main()
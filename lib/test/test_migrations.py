@@ -0,0 +1,61 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from lib.db.migrate import discover_migrations, upgrade
+
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "migrate.db")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def index_names(self):
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'").fetchall()
+        conn.close()
+        return {row[0] for row in rows}
+
+    def test_upgrade_fresh_database(self):
+        applied = upgrade(self.db_path)
+        latest = discover_migrations()[-1][0]
+        self.assertEqual(applied[-1][0], latest)
+        self.assertIn("idx_articles_author_magazine", self.index_names())
+
+    def test_upgrade_is_idempotent(self):
+        upgrade(self.db_path)
+        self.assertEqual(upgrade(self.db_path), [])
+
+    def test_upgrade_keeps_existing_data(self):
+        conn = sqlite3.connect(self.db_path)
+        with open("lib/db/schema.sql") as f:
+            conn.executescript(f.read())
+        conn.execute("INSERT INTO authors (name) VALUES ('Kept')")
+        conn.execute("INSERT INTO magazines (name, category) VALUES ('Mag', 'Cat')")
+        conn.execute("INSERT INTO articles (title, author_id, magazine_id) VALUES ('T', 1, 1)")
+        conn.commit()
+        conn.close()
+
+        upgrade(self.db_path)
+
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(conn.execute("SELECT name FROM authors").fetchall(), [("Kept",)])
+        self.assertEqual(
+            conn.execute("SELECT rowid FROM articles_fts WHERE articles_fts MATCH 'T'").fetchall(),
+            [(1,)])
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM articles WHERE author_id = ?", (1,)
+        ).fetchall()
+        conn.close()
+        self.assertTrue(any("USING" in row[-1] and "INDEX" in row[-1] for row in plan))
+
+    def test_target_version(self):
+        self.assertEqual(upgrade(self.db_path, target=0), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+from lib.db.connection import get_connection_cm
+from lib.models.article import Article
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+from lib.models.pagination import decode_cursor, encode_cursor
+from lib.test.helpers import TempDatabaseTestCase
+
+
+class TestKeysetPagination(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ann, self.ben = Author.create_many([("Ann",), ("Ben",)])
+        self.mag = Magazine.create("Daily", "News")
+        self.articles = Article.create_many(
+            (f"T{i}", self.ann.id if i % 3 else self.ben.id, self.mag.id) for i in range(23)
+        )
+
+    def collect(self, **kwargs):
+        ids, cursor = [], None
+        while True:
+            page = Article.page(cursor=cursor, limit=5, **kwargs)
+            ids.extend(a.id for a in page.items)
+            if page.next_cursor is None:
+                return ids
+            cursor = page.next_cursor
+
+    def test_pages_cover_table_in_order(self):
+        self.assertEqual(self.collect(), [a.id for a in self.articles])
+
+    def test_filtered_pages(self):
+        expected = [a.id for a in self.articles if a.author_id == self.ben.id]
+        self.assertEqual(self.collect(author_id=self.ben.id), expected)
+
+    def test_after_id(self):
+        page = Article.page(after_id=self.articles[20].id, limit=5)
+        self.assertEqual([a.id for a in page.items], [a.id for a in self.articles[21:]])
+        self.assertIsNone(page.next_cursor)
+
+    def test_author_and_magazine_pages(self):
+        page = Author.page(limit=1)
+        self.assertEqual(page.items[0].name, "Ann")
+        self.assertEqual(Author.page(cursor=page.next_cursor).items[0].name, "Ben")
+        self.assertEqual(Magazine.page().items[0].name, "Daily")
+
+    def test_filtered_page_uses_index_order(self):
+        with get_connection_cm() as conn:
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id, title, author_id, magazine_id FROM articles"
+                " WHERE id > ? AND author_id = ? ORDER BY id LIMIT ?", (0, 1, 10)
+            ).fetchall()
+        details = " ".join(row[-1] for row in plan)
+        self.assertIn("idx_articles_author_id", details)
+        self.assertNotIn("TEMP B-TREE", details)
+
+    def test_cursor_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor(42)), 42)
+        with self.assertRaises(ValueError):
+            decode_cursor("not-a-cursor")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+
+from lib.db.connection import get_connection_cm
+from lib.models.article import Article
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+from lib.test.helpers import TempDatabaseTestCase
+
+
+class TestPrefetch(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.authors = Author.create_many([("Ann",), ("Ben",), ("Cy",)])
+        self.mags = Magazine.create_many([("Daily", "News"), ("Weekly", "Sport")])
+        ann, ben, _ = self.authors
+        daily, weekly = self.mags
+        Article.create_many([
+            ("A1", ann.id, daily.id),
+            ("A2", ann.id, daily.id),
+            ("A3", ann.id, daily.id),
+            ("A4", ann.id, weekly.id),
+            ("B1", ben.id, daily.id),
+        ])
+
+    def count_queries(self, fn):
+        statements = []
+        with get_connection_cm() as conn:
+            conn.set_trace_callback(statements.append)
+            try:
+                fn()
+            finally:
+                conn.set_trace_callback(None)
+        return len(statements)
+
+    def test_author_prefetch_matches_lazy_loading(self):
+        expected = {
+            a.id: (
+                sorted(x.title for x in a.articles()),
+                sorted(m.name for m in a.magazines()),
+                sorted(a.topic_areas()),
+            )
+            for a in self.authors
+        }
+        authors = [Author(a.id, a.name) for a in self.authors]
+        queries = self.count_queries(
+            lambda: Author.prefetch(authors, "articles", "magazines", "topic_areas"))
+        self.assertEqual(queries, 3)
+        queries = self.count_queries(lambda: [
+            (a.articles(), a.magazines(), a.topic_areas()) for a in authors])
+        self.assertEqual(queries, 0)
+        for a in authors:
+            self.assertEqual(expected[a.id], (
+                sorted(x.title for x in a.articles()),
+                sorted(m.name for m in a.magazines()),
+                sorted(a.topic_areas()),
+            ))
+        self.assertEqual(authors[2].articles(), [])
+
+    def test_magazine_prefetch(self):
+        mags = Magazine.prefetch(
+            [Magazine(m.id, m.name, m.category) for m in self.mags],
+            "articles", "article_titles", "contributors", "contributing_authors")
+        daily, weekly = mags
+        self.assertEqual(sorted(a.name for a in daily.contributors()), ["Ann", "Ben"])
+        self.assertEqual([a.name for a in daily.contributing_authors()], ["Ann"])
+        self.assertEqual(weekly.contributing_authors(), [])
+        self.assertEqual(sorted(weekly.article_titles()), ["A4"])
+        self.assertEqual(len(daily.articles()), 4)
+
+    def test_unknown_relation(self):
+        with self.assertRaises(ValueError):
+            Author.prefetch(self.authors, "friends")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import tempfile
+import unittest
+
+from lib.test import query_plans
+
+
+class TestQueryPlans(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._tmpdir = tempfile.TemporaryDirectory()
+        cls.db_path = query_plans.generate_dataset(cls._tmpdir.name)
+        cls.statements = query_plans.collect_statements(cls.db_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmpdir.cleanup()
+
+    def test_every_model_method_is_exercised(self):
+        missing = query_plans.public_methods() - set(self.statements)
+        self.assertFalse(missing, f"add a benchmark in lib/bench/runner.py for {sorted(missing)}")
+
+    def test_lookups_use_indexes(self):
+        failures = query_plans.check(self.db_path, self.statements)
+        report = "\n".join(
+            f"{method}: {', '.join(problems)}\n  {sql}\n  plan: {plan}"
+            for method, sql, problems, plan in failures
+        )
+        self.assertFalse(failures, "unexpected scans or sorts:\n" + report)
+
+    def test_allowlist_is_not_stale(self):
+        empty = dict.fromkeys(query_plans.ALLOWLIST, set())
+        flagged = {method for method, *_ in query_plans.check(self.db_path, self.statements, empty)}
+        self.assertEqual(flagged, set(query_plans.ALLOWLIST))
+
+    def test_detects_scans_and_sorts(self):
+        self.assertEqual(
+            query_plans.plan_problems([
+                "SCAN articles",
+                "SCAN articles_fts VIRTUAL TABLE INDEX 32:M1",
+                "SCAN CONSTANT ROW",
+                "USE TEMP B-TREE FOR ORDER BY",
+            ]),
+            {"SCAN articles", "TEMP B-TREE FOR ORDER BY"},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
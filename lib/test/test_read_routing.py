@@ -0,0 +1,79 @@
+import os
+import sqlite3
+import time
+import unittest
+
+from lib.db import connection
+from lib.db.connection import get_connection_cm, get_pool, transaction
+from lib.models.article import Article
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+from lib.test.helpers import TempDatabaseTestCase
+
+
+class TestReadRouting(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = Author.create("Ann")
+        self.magazine = Magazine.create("Nature", "Science")
+        self.author.add_article(self.magazine, "First")
+
+    def test_reader_connections_cannot_write(self):
+        with get_connection_cm(readonly=True) as conn:
+            self.assertEqual(conn.execute("PRAGMA query_only").fetchone()[0], 1)
+            with self.assertRaisesRegex(sqlite3.OperationalError, "readonly"):
+                conn.execute("INSERT INTO authors (name) VALUES ('Ghost')")
+
+    def test_model_reads_use_the_reader_pool(self):
+        connection.close_pools()
+        self.assertEqual([a.title for a in Article.find_by_author(self.author.id)], ["First"])
+        self.assertEqual(Author.find_by_name("Ann").id, self.author.id)
+        self.assertEqual(Magazine.article_counts()[0]["article_count"], 1)
+        self.assertEqual(get_pool(readonly=True).stats()["size"], 1)
+        self.assertEqual(get_pool().stats()["size"], 0)
+        # Committed writes are visible to the next read.
+        self.author.add_article(self.magazine, "Second")
+        self.assertEqual(len(Article.find_by_author(self.author.id)), 2)
+
+    def test_reads_inside_a_transaction_see_its_writes(self):
+        with transaction():
+            Author.create("Ben")
+            self.assertIsNotNone(Author.find_by_name("Ben"))
+            self.assertEqual(get_pool(readonly=True).stats()["idle"],
+                             get_pool(readonly=True).stats()["size"])
+        self.assertIsNotNone(Author.find_by_name("Ben"))
+
+
+class TestReadSnapshot(TempDatabaseTestCase):
+    def tearDown(self):
+        connection.disable_read_snapshot()
+        super().tearDown()
+
+    def test_reads_come_from_the_snapshot_until_refreshed(self):
+        Author.create("Ann")
+        snapshot = connection.enable_read_snapshot(interval=3600)
+        self.assertTrue(os.path.exists(snapshot.path))
+        Author.create("Ben")
+        self.assertIsNone(Author.find_by_name("Ben"))
+        self.assertEqual(Author.find_by_name("Ann").name, "Ann")
+        with transaction():
+            self.assertIsNotNone(Author.find_by_name("Ben"))
+        snapshot.refresh()
+        self.assertIsNotNone(Author.find_by_name("Ben"))
+
+        connection.disable_read_snapshot()
+        self.assertFalse(os.path.exists(snapshot.path))
+        Author.create("Cy")
+        self.assertIsNotNone(Author.find_by_name("Cy"))
+
+    def test_snapshot_refreshes_in_the_background(self):
+        connection.enable_read_snapshot(interval=0.05)
+        Author.create("Ann")
+        deadline = time.monotonic() + 5
+        while Author.find_by_name("Ann") is None:
+            self.assertLess(time.monotonic(), deadline, "snapshot was never refreshed")
+            time.sleep(0.02)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+from lib.db.connection import get_connection_cm
+from lib.models.article import Article
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+from lib.test.helpers import TempDatabaseTestCase
+
+
+class TestArticleSearch(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = Author.create("Ann")
+        self.science, self.tech = Magazine.create_many([("Nature", "Science"), ("Wired", "Tech")])
+        Article.create_many([
+            ("Quantum computing explained", self.author.id, self.science.id),
+            ("Quantum quantum quantum", self.author.id, self.tech.id),
+            ("Gardening for beginners", self.author.id, self.tech.id),
+        ])
+
+    def test_keyword_match_ranked(self):
+        titles = [a.title for a in Article.search("quantum")]
+        self.assertEqual(titles, ["Quantum quantum quantum", "Quantum computing explained"])
+
+    def test_all_words_must_match(self):
+        self.assertEqual([a.title for a in Article.search("quantum computing")],
+                         ["Quantum computing explained"])
+
+    def test_prefix_and_magazine_filter(self):
+        results = Article.search("quant*", magazine_id=self.science.id)
+        self.assertEqual([a.title for a in results], ["Quantum computing explained"])
+
+    def test_fts_syntax_is_not_interpreted(self):
+        self.assertEqual(Article.search('OR "'), [])
+        self.assertEqual(Article.search("   "), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        article = Article.search("gardening")[0]
+        with get_connection_cm() as conn:
+            conn.execute("UPDATE articles SET title = 'Composting basics' WHERE id = ?", (article.id,))
+            conn.commit()
+        self.assertEqual(Article.search("gardening"), [])
+        self.assertEqual(len(Article.search("composting")), 1)
+        with get_connection_cm() as conn:
+            conn.execute("DELETE FROM articles WHERE id = ?", (article.id,))
+            conn.commit()
+        self.assertEqual(Article.search("composting"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import sqlite3
+import unittest
+from unittest import mock
+
+from lib.db import seed
+from lib.db.aggregates import verify
+from lib.db.connection import get_connection_cm
+from lib.models.article import Article
+from lib.models.author import Author
+from lib.test.helpers import TempDatabaseTestCase
+
+
+class TestSeeder(TempDatabaseTestCase):
+    def rows(self, sql):
+        with get_connection_cm() as conn:
+            return [tuple(row) for row in conn.execute(sql)]
+
+    def test_counts_and_summary(self):
+        summary = seed.seed_db(authors=20, magazines=4, articles=500)
+        self.assertEqual((summary["authors"], summary["magazines"], summary["articles"]), (20, 4, 500))
+        self.assertEqual(self.rows("SELECT COUNT(*) FROM articles"), [(500,)])
+        self.assertEqual(verify(), [])
+
+    def test_same_seed_same_rows(self):
+        seed.seed_db(authors=10, magazines=3, articles=200, seed=5)
+        first = self.rows("SELECT * FROM articles ORDER BY id")
+        self.tearDown()
+        self.setUp()
+        seed.seed_db(authors=10, magazines=3, articles=200, seed=5)
+        self.assertEqual(self.rows("SELECT * FROM articles ORDER BY id"), first)
+
+    def test_zipf_skew(self):
+        seed.seed_db(authors=100, magazines=5, articles=5000, skew=1.2)
+        counts = [n for (n,) in self.rows(
+            "SELECT COUNT(*) FROM articles GROUP BY author_id ORDER BY 1 DESC")]
+        # Uniform picks would give each author about 50 articles.
+        self.assertGreater(counts[0], 500)
+        self.assertLess(counts[-1], 20)
+
+    def test_appends_to_existing_data(self):
+        author = Author.create("Ann")
+        seed.seed_db(authors=5, magazines=2, articles=50)
+        self.assertEqual(Author.find_by_id(author.id).name, "Ann")
+        self.assertEqual(self.rows("SELECT COUNT(*) FROM authors"), [(6,)])
+        self.assertEqual(verify(), [])
+
+    def test_articles_only_use_stored_authors_and_magazines(self):
+        seed.seed_db(authors=3, magazines=2, articles=0)
+        summary = seed.seed_db(authors=0, magazines=0, articles=50)
+        self.assertEqual(summary["articles"], 50)
+        self.assertEqual(self.rows("SELECT COUNT(*) FROM articles WHERE author_id <= 3 AND magazine_id <= 2"),
+                         [(50,)])
+        self.assertEqual(verify(), [])
+
+    def test_articles_without_magazines_is_an_error(self):
+        Author.create("Ann")
+        with self.assertRaisesRegex(ValueError, "without magazines"):
+            seed.seed_db(authors=0, magazines=0, articles=50)
+        with self.assertRaises(SystemExit):
+            seed.main(["--authors", "0", "--magazines", "0", "--articles", "5"])
+        self.assertEqual(self.rows("SELECT COUNT(*) FROM articles"), [(0,)])
+
+    def test_bulk_load_rebuilds_indexes_triggers_and_search(self):
+        with get_connection_cm() as conn:
+            schema = sorted(tuple(row) for row in conn.execute(
+                "SELECT type, name, sql FROM sqlite_master WHERE tbl_name = 'articles'"))
+        with mock.patch.object(seed, "BULK_MIN_ARTICLES", 100):
+            seed.seed_db(authors=10, magazines=3, articles=1000)
+        with get_connection_cm() as conn:
+            after = sorted(tuple(row) for row in conn.execute(
+                "SELECT type, name, sql FROM sqlite_master WHERE tbl_name = 'articles'"))
+        self.assertEqual(after, schema)
+        self.assertEqual(verify(), [])
+        word = self.rows("SELECT title FROM articles LIMIT 1")[0][0].split()[0]
+        self.assertTrue(Article.search(word))
+        # Triggers are back, so later writes keep the aggregates in step.
+        Author.create("Ben").add_article(mock.Mock(id=1), "Later article")
+        self.assertEqual(verify(), [])
+
+    def test_failed_load_leaves_database_untouched(self):
+        with mock.patch.object(seed, "recompute", side_effect=sqlite3.OperationalError("boom")), \
+                mock.patch.object(seed, "BULK_MIN_ARTICLES", 10):
+            with self.assertRaises(sqlite3.OperationalError):
+                seed.seed_db(authors=5, magazines=2, articles=100)
+        self.assertEqual(self.rows("SELECT COUNT(*) FROM articles"), [(0,)])
+        self.assertTrue(self.rows(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'articles'"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Cumulative `python -X importtime` budget for each CLI entry point, in
+# microseconds. Measured at about 14ms; the slack absorbs slow machines.
+IMPORT_BUDGET_US = 60_000
+ENTRY_POINTS = ("cli", "lib.models.cli")
+# Only needed by options that most runs never choose.
+LAZY_MODULES = (
+    "faker", "unittest", "logging", "json", "base64", "re", "asyncio",
+    "lib.db.seed", "lib.db.migrate", "lib.db.aggregates",
+)
+
+
+def _python(*args):
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)  # measure with warm .pyc files
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def import_time_us(module, runs=3):
+    """Best cumulative import time of ``module`` over ``runs`` fresh interpreters."""
+    _python("-c", f"import {module}")
+    best = None
+    for _ in range(runs):
+        stderr = _python("-X", "importtime", "-c", f"import {module}").stderr
+        for line in stderr.splitlines():
+            fields = [field.strip() for field in line.split("|")]
+            if len(fields) == 3 and fields[2] == module:
+                cumulative = int(fields[1])
+                best = cumulative if best is None else min(best, cumulative)
+    return best
+
+
+class TestStartup(unittest.TestCase):
+    def test_heavy_modules_are_not_imported(self):
+        for module in ENTRY_POINTS:
+            code = (f"import sys, {module}; "
+                    f"print(' '.join(m for m in {LAZY_MODULES!r} if m in sys.modules))")
+            loaded = _python("-c", code).stdout.split()
+            self.assertEqual(loaded, [], f"{module} imports {loaded} at startup")
+
+    def test_import_time_budget(self):
+        for module in ENTRY_POINTS:
+            elapsed = import_time_us(module)
+            self.assertLessEqual(elapsed, IMPORT_BUDGET_US,
+                                 f"importing {module} took {elapsed}us")
+
+
+if __name__ == "__main__":
+    unittest.main()
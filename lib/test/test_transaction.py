@@ -0,0 +1,76 @@
+import sqlite3
+import unittest
+
+from lib.db import connection
+from lib.db.connection import TransactionRolledBack, get_connection_cm, transaction
+from lib.models.article import Article
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+from lib.test.helpers import TempDatabaseTestCase
+
+
+class TestTransaction(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.magazine = Magazine.create("Nature", "Science")
+
+    def count(self, table):
+        # A separate connection only sees committed rows.
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_model_calls_share_one_commit(self):
+        connection.enable_instrumentation()
+        connection.reset_instrumentation()
+        try:
+            with transaction() as conn:
+                author = Author.create("Ann")
+                author.add_article(self.magazine, "One")
+                author.add_article(self.magazine, "Two")
+                with get_connection_cm() as inner:
+                    self.assertIs(inner, conn)
+                self.assertEqual(self.count("articles"), 0)
+            commits = connection.instrumentation_stats()["sql"]["COMMIT"]["calls"]
+        finally:
+            connection.disable_instrumentation()
+        self.assertEqual(commits, 1)
+        self.assertEqual(self.count("articles"), 2)
+        self.assertEqual([a.title for a in author.articles()], ["One", "Two"])
+
+    def test_exception_rolls_everything_back(self):
+        with self.assertRaises(RuntimeError):
+            with transaction():
+                author = Author.create("Ann")
+                author.add_article(self.magazine, "One")
+                raise RuntimeError
+        self.assertEqual((self.count("authors"), self.count("articles")), (0, 0))
+        self.assertIsNone(Author.find_by_name("Ann"))
+
+    def test_nested_block_is_a_savepoint(self):
+        with transaction():
+            author = Author.create("Ann")
+            with self.assertRaises(RuntimeError):
+                with transaction():
+                    author.add_article(self.magazine, "Dropped")
+                    raise RuntimeError
+            with transaction():
+                author.add_article(self.magazine, "Kept")
+        self.assertEqual([a.title for a in Article.find_by_author(author.id)], ["Kept"])
+
+    def test_inner_rollback_aborts_the_transaction(self):
+        with self.assertRaises(TransactionRolledBack):
+            with transaction() as conn:
+                Author.create("Ann")
+                conn.rollback()
+        self.assertEqual(self.count("authors"), 0)
+
+    def test_outside_a_transaction_models_commit_as_before(self):
+        Author.create("Ann")
+        self.assertEqual(self.count("authors"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import sqlite3
+import threading
+import unittest
+
+from lib.db.connection import get_connection_cm, transaction
+from lib.models import write_behind
+from lib.models.article import Article
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+from lib.models.write_behind import GroupCommitWriter
+from lib.test.helpers import TempDatabaseTestCase
+
+
+class TestWriteBehind(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = Author.create("Ann")
+        self.magazine = Magazine.create("Nature", "Science")
+
+    def tearDown(self):
+        write_behind.disable()
+        super().tearDown()
+
+    def rows(self):
+        with get_connection_cm() as conn:
+            return [tuple(row) for row in conn.execute(
+                "SELECT id, title, author_id, magazine_id FROM articles ORDER BY id")]
+
+    def test_futures_resolve_to_committed_articles_in_one_group(self):
+        writer = write_behind.enable(max_rows=100, max_delay_ms=1000)
+        futures = [write_behind.submit(f"T{i}", self.author.id, self.magazine.id) for i in range(10)]
+        write_behind.flush()
+        articles = [f.result(0) for f in futures]
+        self.assertEqual(self.rows(), [(a.id, a.title, a.author_id, a.magazine_id) for a in articles])
+        self.assertEqual([a.title for a in articles], [f"T{i}" for i in range(10)])
+        self.assertEqual(writer.stats(), {"rows": 10, "commits": 1, "failed": 0, "pending": 0})
+
+    def test_max_rows_splits_groups(self):
+        writer = write_behind.enable(max_rows=4, max_delay_ms=1000)
+        for i in range(10):
+            write_behind.submit(f"T{i}", self.author.id, self.magazine.id)
+        write_behind.flush()
+        self.assertEqual(writer.stats()["commits"], 3)
+
+    def test_bad_row_fails_only_its_future(self):
+        write_behind.enable(max_delay_ms=1000)
+        good = write_behind.submit("Good", self.author.id, self.magazine.id)
+        bad = write_behind.submit(None, self.author.id, self.magazine.id)
+        write_behind.flush()
+        self.assertEqual(good.result(0).title, "Good")
+        self.assertIsInstance(bad.exception(0), sqlite3.IntegrityError)
+        self.assertEqual([row[1] for row in self.rows()], ["Good"])
+
+    def test_concurrent_creates_share_commits(self):
+        writer = write_behind.enable(max_rows=50, max_delay_ms=20)
+        results = []
+
+        def worker(n):
+            for i in range(25):
+                results.append(Article.create(f"W{n}-{i}", self.author.id, self.magazine.id))
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(a.id for a in results), [row[0] for row in self.rows()])
+        stats = writer.stats()
+        self.assertEqual(stats["rows"], 200)
+        self.assertLess(stats["commits"], 200)
+
+    def test_create_inside_transaction_bypasses_writer(self):
+        writer = write_behind.enable()
+        with self.assertRaises(RuntimeError):
+            with transaction():
+                self.author.add_article(self.magazine, "Rolled back")
+                raise RuntimeError
+        self.assertEqual(self.rows(), [])
+        self.assertEqual(writer.stats()["rows"], 0)
+
+    def test_disable_commits_queued_rows(self):
+        write_behind.enable(max_delay_ms=10_000)
+        future = write_behind.submit("Late", self.author.id, self.magazine.id)
+        write_behind.disable()
+        self.assertEqual(future.result(0).title, "Late")
+        self.assertIsNone(write_behind.current())
+        with self.assertRaises(RuntimeError):
+            write_behind.submit("Too late", self.author.id, self.magazine.id)
+
+    def test_durability_selects_profile(self):
+        write_behind.enable(durability="full")
+        write_behind.submit("Safe", self.author.id, self.magazine.id).result(5)
+        with get_connection_cm(profile="durable") as conn:
+            self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 2)
+        with self.assertRaises(ValueError):
+            GroupCommitWriter(durability="eventually")
+
+
+if __name__ == "__main__":
+    unittest.main()